@@ -8,6 +8,7 @@ This Python script can:
 4. Schedule backups (with cron or Python scheduler)
 """
 
+import argparse
 import subprocess
 import os
 import sys
@@ -18,6 +19,21 @@ from datetime import datetime
 BACKUP_SCRIPT = Path(__file__).parent / "sqlbackup.sh"
 BACKUP_FOLDER = Path.home() / "backups"
 
+# Cached result of BACKUP_FOLDER.is_dir(); None means "check again"
+_backup_folder_exists = None
+
+def backup_folder_exists():
+    """Check for the backup folder once and reuse the answer"""
+    global _backup_folder_exists
+    if _backup_folder_exists is None:
+        _backup_folder_exists = BACKUP_FOLDER.is_dir()
+    return _backup_folder_exists
+
+def forget_backup_folder():
+    """Drop the cached folder check after anything that may create or remove it"""
+    global _backup_folder_exists
+    _backup_folder_exists = None
+
 def run_shell_script(script_path):
     """
     Run a shell script from Python using subprocess
@@ -30,22 +46,29 @@ def run_shell_script(script_path):
         print(f"Error: Script {script_path} not found!")
         return False
     
-    # Make sure script is executable
-    os.chmod(script_path, 0o755)  # rwxr-xr-x permissions
+    # Make sure script is executable (only chmod when an x bit is missing)
+    mode = script_path.stat().st_mode
+    if mode & 0o111 != 0o111:
+        os.chmod(script_path, mode | 0o755)  # rwxr-xr-x permissions
     
     try:
         print(f"Running shell script: {script_path}")
         print("-" * 60)
         
         # Run the shell script
-        # subprocess.run() executes the shell script
+        # subprocess.run() executes the shell script. An absolute path plus
+        # close_fds=False lets CPython use posix_spawn instead of fork+exec
         result = subprocess.run(
-            [str(script_path)],  # Command to run
+            [str(script_path.resolve())],  # Command to run
             capture_output=True,  # Capture output
             text=True,            # Return text (not bytes)
-            check=False          # Don't raise exception on error
+            check=False,         # Don't raise exception on error
+            close_fds=False      # Allow the posix_spawn fast path
         )
         
+        # The backup script creates the backup folder if it is missing
+        forget_backup_folder()
+        
         # Print the output
         if result.stdout:
             print(result.stdout)
@@ -64,13 +87,20 @@ def run_shell_script(script_path):
         return False
 
 def list_backups():
-    """List all backup files"""
-    if not BACKUP_FOLDER.exists():
+    """
+    List all backup files, newest first
+    
+    Returns (name, stat_result) pairs from a single os.scandir() pass so
+    callers can read size and mtime without stat-ing each file again.
+    """
+    if not backup_folder_exists():
         print(f"Backup folder {BACKUP_FOLDER} does not exist.")
         return []
     
-    backups = list(BACKUP_FOLDER.glob("*.gz"))
-    backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+    with os.scandir(BACKUP_FOLDER) as it:
+        backups = [(entry.name, entry.stat()) for entry in it
+                   if entry.name.endswith(".gz") and entry.is_file(follow_symlinks=False)]
+    backups.sort(key=lambda b: b[1].st_mtime, reverse=True)
     return backups
 
 def show_backups():
@@ -81,15 +111,15 @@ def show_backups():
         print("No backups found.")
         return
     
-    print(f"\nFound {len(backups)} backup(s):")
-    print("-" * 60)
-    for i, backup in enumerate(backups, 1):
-        size = backup.stat().st_size / (1024 * 1024)  # Size in MB
-        mtime = datetime.fromtimestamp(backup.stat().st_mtime)
-        print(f"{i}. {backup.name}")
-        print(f"   Size: {size:.2f} MB")
-        print(f"   Created: {mtime.strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+    # Build the whole listing first and write it out in one go
+    lines = [f"\nFound {len(backups)} backup(s):\n", "-" * 60 + "\n"]
+    for i, (name, st) in enumerate(backups, 1):
+        size = st.st_size / (1024 * 1024)  # Size in MB
+        mtime = datetime.fromtimestamp(st.st_mtime)
+        lines.append(f"{i}. {name}\n"
+                     f"   Size: {size:.2f} MB\n"
+                     f"   Created: {mtime:%Y-%m-%d %H:%M:%S}\n\n")
+    sys.stdout.write("".join(lines))
 
 def delete_all_backups():
     """Delete all backup files"""
@@ -104,14 +134,16 @@ def delete_all_backups():
     
     if response.lower() == 'yes':
         deleted = 0
-        for backup in backups:
+        folder = os.fspath(BACKUP_FOLDER)
+        for name, _ in backups:
             try:
-                backup.unlink()  # Delete file
-                print(f"Deleted: {backup.name}")
+                os.unlink(os.path.join(folder, name))  # Delete file
+                print(f"Deleted: {name}")
                 deleted += 1
             except Exception as e:
-                print(f"Error deleting {backup.name}: {e}")
+                print(f"Error deleting {name}: {e}")
         
+        forget_backup_folder()
         print(f"\nDeleted {deleted} backup file(s).")
         return True
     else:
@@ -128,37 +160,43 @@ def delete_old_backups(days=30):
     
     cutoff_time = datetime.now().timestamp() - (days * 24 * 60 * 60)
     deleted = 0
+    folder = os.fspath(BACKUP_FOLDER)
     
-    for backup in backups:
-        if backup.stat().st_mtime < cutoff_time:
+    for name, st in backups:
+        if st.st_mtime < cutoff_time:
             try:
-                backup.unlink()
-                print(f"Deleted old backup: {backup.name}")
+                os.unlink(os.path.join(folder, name))
+                print(f"Deleted old backup: {name}")
                 deleted += 1
             except Exception as e:
-                print(f"Error deleting {backup.name}: {e}")
+                print(f"Error deleting {name}: {e}")
     
     if deleted > 0:
         print(f"\nDeleted {deleted} old backup(s).")
     else:
         print("No old backups to delete.")
 
-def main():
+MENU = """\
+============================================================
+MySQL Backup Automation Script
+============================================================
+
+This script demonstrates:
+1. How Python can run shell scripts (.sh files)
+2. How to automate database backups
+3. How to manage backup files from Python
+
+Options:
+1. Run backup script (execute sqlbackup.sh)
+2. List all backups
+3. Delete all backups
+4. Delete old backups (older than 30 days)
+5. Run backup and show results
+0. Exit"""
+
+def menu():
     """Main menu"""
-    print("=" * 60)
-    print("MySQL Backup Automation Script")
-    print("=" * 60)
-    print("\nThis script demonstrates:")
-    print("1. How Python can run shell scripts (.sh files)")
-    print("2. How to automate database backups")
-    print("3. How to manage backup files from Python")
-    print("\nOptions:")
-    print("1. Run backup script (execute sqlbackup.sh)")
-    print("2. List all backups")
-    print("3. Delete all backups")
-    print("4. Delete old backups (older than 30 days)")
-    print("5. Run backup and show results")
-    print("0. Exit")
+    print(MENU)
     
     choice = input("\nEnter your choice: ")
     
@@ -181,28 +219,35 @@ def main():
     else:
         print("Invalid choice.")
 
-if __name__ == "__main__":
-    # You can also run the backup directly from command line
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-        
-        if command == "backup":
-            run_shell_script(BACKUP_SCRIPT)
-        elif command == "list":
-            show_backups()
-        elif command == "delete-all":
-            delete_all_backups()
-        elif command == "cleanup":
-            delete_old_backups(30)
-        else:
-            print(f"Unknown command: {command}")
-            print("Available commands: backup, list, delete-all, cleanup")
+def cmd_interactive():
+    """Show the menu until the user stops"""
+    while True:
+        menu()
+        print("\n" + "=" * 60)
+        continue_choice = input("Continue? (yes/no): ")
+        if continue_choice.lower() != 'yes':
+            break
+
+def main(argv=None):
+    """Run one command from the command line, or the menu when none is given"""
+    parser = argparse.ArgumentParser(description="MySQL backup automation")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("backup", help="run the backup script").set_defaults(
+        func=lambda args: run_shell_script(BACKUP_SCRIPT))
+    commands.add_parser("list", help="list all backups").set_defaults(
+        func=lambda args: show_backups())
+    commands.add_parser("delete-all", help="delete all backups").set_defaults(
+        func=lambda args: delete_all_backups())
+    cleanup = commands.add_parser("cleanup", help="delete old backups")
+    cleanup.add_argument("--days", type=int, default=30,
+                         help="delete backups older than this many days (default: 30)")
+    cleanup.set_defaults(func=lambda args: delete_old_backups(args.days))
+    
+    args = parser.parse_args(argv)
+    if args.command is None:
+        cmd_interactive()
     else:
-        # Interactive mode
-        while True:
-            main()
-            print("\n" + "=" * 60)
-            continue_choice = input("Continue? (yes/no): ")
-            if continue_choice.lower() != 'yes':
-                break
+        args.func(args)
 
+if __name__ == "__main__":
+    main()
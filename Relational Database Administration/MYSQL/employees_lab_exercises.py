@@ -7,6 +7,11 @@ Exercises: EXPLAIN, Indexing, UNION ALL, Selective Queries
 import mysql.connector
 from mysql.connector import Error
 import time
+import re
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # ---------- Configuration ----------
 DB_CONFIG = {
@@ -17,6 +22,10 @@ DB_CONFIG = {
     "database": "employees"
 }
 
+# Actual row count of the top plan node in EXPLAIN ANALYZE output,
+# e.g. "(actual time=0.061..95.4 rows=117138 loops=1)"
+ACTUAL_ROWS_RE = re.compile(r"actual time=[\d.]+\.\.[\d.]+ rows=(\d+)")
+
 # ---------- Helper Functions ----------
 
 def get_connection():
@@ -40,17 +49,20 @@ def run_query_with_timing(cursor, query, description):
     cursor.execute(query)
     elapsed = time.time() - start_time
     
-    rows = cursor.fetchall()
+    # Keep only the first 10 rows; the rest are streamed and counted
+    rows = cursor.fetchmany(10)
+    total = len(rows)
+    batch = cursor.fetchmany(1000)
+    while batch:
+        total += len(batch)
+        batch = cursor.fetchmany(1000)
     
     print(f"[OK] Executed in {elapsed:.4f} seconds")
-    print(f"[INFO] Rows returned: {len(rows)}")
-    if rows and len(rows) <= 10:
-        for row in rows:
-            print(f"       {row}")
-    elif rows:
-        print(f"       (showing first 10 of {len(rows)} rows)")
-        for row in rows[:10]:
-            print(f"       {row}")
+    print(f"[INFO] Rows returned: {total}")
+    if total > 10:
+        print(f"       (showing first 10 of {total} rows)")
+    for row in rows:
+        print(f"       {row}")
     
     return elapsed
 
@@ -68,19 +80,53 @@ def explain_query(cursor, query, description):
     columns = [desc[0] for desc in cursor.description]
     rows = cursor.fetchall()
     
+    # One row template for the whole table
+    row_format = " | ".join(["%-15s"] * len(columns))
+    
     # Print header
-    print(" | ".join(f"{col:15}" for col in columns))
+    print(row_format % tuple(columns))
     print("-" * (len(columns) * 18))
     
     # Print rows
     for row in rows:
-        print(" | ".join(f"{str(val):15}" for val in row))
+        print(row_format % tuple(map(str, row)))
     
     print("\n[INFO] Key points to look for:")
     print("       - 'key': Which index is used (NULL = no index)")
     print("       - 'rows': Estimated rows examined")
     print("       - 'Extra': Using index, Using where, etc.")
 
+class ThreadOutput:
+    """sys.stdout stand-in that sends each worker thread's prints to its own buffer."""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text):
+        return getattr(self.local, "buffer", self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+def run_exercise(index, func):
+    """Run one exercise, reporting errors the same way for serial and parallel runs."""
+    try:
+        func()
+    except Error as e:
+        print(f"\n[ERROR] Exercise {index} error: {e}")
+    except Exception as e:
+        print(f"\n[ERROR] Unexpected error in Exercise {index}: {e}")
+
+def run_exercise_captured(index, func):
+    """Run one exercise on a worker thread and return everything it printed."""
+    sys.stdout.local.buffer = io.StringIO()
+    try:
+        run_exercise(index, func)
+        return sys.stdout.local.buffer.getvalue()
+    finally:
+        del sys.stdout.local.buffer
+
 # ---------- Lab Exercises ----------
 
 def exercise_1_basic_query():
@@ -221,11 +267,25 @@ def exercise_5_filtering_optimization():
     WHERE birth_date > '1960-01-01';
     """
     print(query_bad)
-    cursor.execute(query_bad)
-    print(f"[OK] Rows matching condition: {len(cursor.fetchall())}")
     
-    # Show EXPLAIN to understand index usage
-    explain_query(cursor, query_bad, "Filter on birth_date (is there an index?)")
+    # EXPLAIN ANALYZE (MySQL 8.0.18+) runs the query once on the server and
+    # reports the plan together with the actual number of matching rows
+    try:
+        cursor.execute(f"EXPLAIN ANALYZE {query_bad}")
+        plan = cursor.fetchone()[0]
+        match = ACTUAL_ROWS_RE.search(plan)
+        if match:
+            print(f"[OK] Rows matching condition: {match.group(1)}")
+        print(f"\n{'='*70}")
+        print("EXPLAIN ANALYZE: Filter on birth_date (is there an index?)")
+        print(f"{'='*70}")
+        print(plan)
+    except Error as e:
+        print(f"[WARNING] EXPLAIN ANALYZE may not be available: {e}")
+        # Fallback: count on the server and show the standard EXPLAIN
+        cursor.execute("SELECT COUNT(*) FROM employees WHERE birth_date > '1960-01-01';")
+        print(f"[OK] Rows matching condition: {cursor.fetchone()[0]}")
+        explain_query(cursor, query_bad, "Filter on birth_date (is there an index?)")
     
     cursor.close()
     conn.close()
@@ -287,13 +347,26 @@ if __name__ == "__main__":
         ("Exercise 6: Advanced EXPLAIN Analysis", exercise_6_advanced_explain),
     ]
     
-    for i, (title, func) in enumerate(exercises, 1):
-        try:
-            func()
-        except Error as e:
-            print(f"\n[ERROR] Exercise {i} error: {e}")
-        except Exception as e:
-            print(f"\n[ERROR] Unexpected error in Exercise {i}: {e}")
+    # Exercises 1 and 2 run first, in order: 2 adds an index that 1 must not see.
+    # The remaining exercises are independent reads, so they run concurrently
+    # and their output is printed afterwards in exercise order.
+    SERIAL_EXERCISES = 2
+    
+    for i, (title, func) in enumerate(exercises[:SERIAL_EXERCISES], 1):
+        run_exercise(i, func)
+    
+    parallel = exercises[SERIAL_EXERCISES:]
+    indexes = range(SERIAL_EXERCISES + 1, len(exercises) + 1)
+    sys.stdout = ThreadOutput(sys.stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=len(parallel)) as executor:
+            outputs = list(executor.map(run_exercise_captured, indexes,
+                                        [func for _, func in parallel]))
+    finally:
+        sys.stdout = sys.stdout.stream
+    
+    for output in outputs:
+        print(output, end="")
     
     print("\n")
     print("╔" + "="*68 + "╗")
@@ -1,5 +1,6 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
 
 # ---------- Connection settings ----------
 DB_CONFIG = {
@@ -7,18 +8,52 @@ DB_CONFIG = {
     "port": 3306,
     "user": "root",
     "password": "",  # No password for local MySQL (as installed by Homebrew)
-    "database": "world"  # World database
+    "database": "world",  # World database
+    "use_pure": False,  # Use the C extension when it is installed
+    # Sessions survive checkout (pool_reset_session=False), so don't leave
+    # a read transaction and its old snapshot open between calls
+    "autocommit": True
 }
 
+# Shared pool, created on first use; conn.close() hands connections back to it
+_POOL = None
+
 def get_connection():
-    """Get MySQL database connection"""
+    """Get MySQL database connection from the shared pool"""
+    global _POOL
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        if _POOL is None:
+            # Sessions are not reset on checkout, so statements prepared on a
+            # pooled connection stay prepared for the next caller
+            _POOL = pooling.MySQLConnectionPool(pool_name="world", pool_size=4,
+                                                pool_reset_session=False, **DB_CONFIG)
+        return _POOL.get_connection()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# Prepared cursors by (server connection id, SQL). Helpers that take
+# parameters use them, so each statement is prepared once per pooled
+# connection and later calls only send the parameters.
+_PREPARED = {}
+
+def prepared_cursor(conn, sql):
+    """Get the prepared cursor for sql on this pooled connection, creating it on first use"""
+    key = (conn.connection_id, sql)
+    cursor = _PREPARED.get(key)
+    if cursor is None:
+        cursor = _PREPARED[key] = conn.cursor(prepared=True)
+    return cursor
+
+def forget_prepared(conn, sql):
+    """Drop a prepared cursor after an error so the next call prepares it again"""
+    cursor = _PREPARED.pop((conn.connection_id, sql), None)
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Error:
+            pass  # The connection is probably gone already
+
 # ---------- Query functions ----------
 
 def get_city_count():
@@ -75,6 +110,30 @@ def get_languages_count():
             cursor.close()
             conn.close()
 
+def get_table_counts():
+    """Get city, country and language totals in a single round trip"""
+    sql = """
+    SELECT (SELECT COUNT(*) FROM city),
+           (SELECT COUNT(*) FROM country),
+           (SELECT COUNT(*) FROM countrylanguage);
+    """
+    conn = get_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            counts = cursor.fetchone()
+            print(f"Total cities: {counts[0]:,}")
+            print(f"Total countries: {counts[1]:,}")
+            print(f"Total languages: {counts[2]:,}")
+            return counts
+        except Error as e:
+            print(f"Error: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
 def get_cities_by_country(country_code, limit=10):
     """Get cities in a specific country"""
     sql = """
@@ -87,7 +146,7 @@ def get_cities_by_country(country_code, limit=10):
     conn = get_connection()
     if conn:
         try:
-            cursor = conn.cursor()
+            cursor = prepared_cursor(conn, sql)
             cursor.execute(sql, (country_code, limit))
             rows = cursor.fetchall()
             print(f"\nCities in {country_code} (showing {len(rows)}):")
@@ -95,11 +154,11 @@ def get_cities_by_country(country_code, limit=10):
                 print(f"  {row[0]} | {row[1]} | Population: {row[2]:,}")
             return rows
         except Error as e:
+            forget_prepared(conn, sql)
             print(f"Error: {e}")
             return None
         finally:
-            cursor.close()
-            conn.close()
+            conn.close()  # The prepared cursor stays open for reuse
 
 def get_countries_by_continent(continent, limit=10):
     """Get countries in a specific continent"""
@@ -113,7 +172,7 @@ def get_countries_by_continent(continent, limit=10):
     conn = get_connection()
     if conn:
         try:
-            cursor = conn.cursor()
+            cursor = prepared_cursor(conn, sql)
             cursor.execute(sql, (continent, limit))
             rows = cursor.fetchall()
             print(f"\nCountries in {continent} (showing {len(rows)}):")
@@ -121,11 +180,11 @@ def get_countries_by_continent(continent, limit=10):
                 print(f"  {row[0]} | {row[1]} | Pop: {row[2]:,} | Area: {row[3]:,.2f} km² | Life: {row[4]} years")
             return rows
         except Error as e:
+            forget_prepared(conn, sql)
             print(f"Error: {e}")
             return None
         finally:
-            cursor.close()
-            conn.close()
+            conn.close()  # The prepared cursor stays open for reuse
 
 def get_languages_by_country(country_code, limit=10):
     """Get languages spoken in a specific country"""
@@ -139,7 +198,7 @@ def get_languages_by_country(country_code, limit=10):
     conn = get_connection()
     if conn:
         try:
-            cursor = conn.cursor()
+            cursor = prepared_cursor(conn, sql)
             cursor.execute(sql, (country_code, limit))
             rows = cursor.fetchall()
             print(f"\nLanguages in {country_code} (showing {len(rows)}):")
@@ -148,11 +207,11 @@ def get_languages_by_country(country_code, limit=10):
                 print(f"  {row[0]} | {official} | {row[2]}%")
             return rows
         except Error as e:
+            forget_prepared(conn, sql)
             print(f"Error: {e}")
             return None
         finally:
-            cursor.close()
-            conn.close()
+            conn.close()  # The prepared cursor stays open for reuse
 
 def get_top_cities_by_population(limit=10):
     """Get top cities by population"""
@@ -165,7 +224,7 @@ def get_top_cities_by_population(limit=10):
     conn = get_connection()
     if conn:
         try:
-            cursor = conn.cursor()
+            cursor = prepared_cursor(conn, sql)
             cursor.execute(sql, (limit,))
             rows = cursor.fetchall()
             print(f"\nTop {limit} cities by population:")
@@ -173,11 +232,11 @@ def get_top_cities_by_population(limit=10):
                 print(f"  {row[0]} ({row[1]}) | {row[2]} | {row[3]:,}")
             return rows
         except Error as e:
+            forget_prepared(conn, sql)
             print(f"Error: {e}")
             return None
         finally:
-            cursor.close()
-            conn.close()
+            conn.close()  # The prepared cursor stays open for reuse
 
 def get_country_info(country_code):
     """Get detailed information about a country"""
@@ -190,9 +249,10 @@ def get_country_info(country_code):
     conn = get_connection()
     if conn:
         try:
-            cursor = conn.cursor()
+            cursor = prepared_cursor(conn, sql)
             cursor.execute(sql, (country_code,))
-            row = cursor.fetchone()
+            rows = cursor.fetchall()  # Leave no unread result on the reused cursor
+            row = rows[0] if rows else None
             if row:
                 print(f"\nCountry Information: {row[1]} ({row[0]})")
                 print(f"  Continent: {row[2]}")
@@ -207,11 +267,11 @@ def get_country_info(country_code):
                 print(f"Country {country_code} not found")
                 return None
         except Error as e:
+            forget_prepared(conn, sql)
             print(f"Error: {e}")
             return None
         finally:
-            cursor.close()
-            conn.close()
+            conn.close()  # The prepared cursor stays open for reuse
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -219,9 +279,7 @@ if __name__ == "__main__":
     print("=" * 60)
     
     # Get statistics
-    get_city_count()
-    get_country_count()
-    get_languages_count()
+    get_table_counts()
     
     # Get top cities
     get_top_cities_by_population(limit=10)
@@ -4,12 +4,22 @@ Script to download, extract, and import the employees database into MySQL.
 Lab: Improving Performance of Slow Queries in MySQL
 """
 
-import subprocess
+import mysql.connector
+from mysql.connector import Error
 import sys
 import os
 from pathlib import Path
 import urllib.request
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+
+# Use Intel ISA-L's faster inflate for zip extraction when it is installed
+try:
+    from isal import isal_zlib
+    zipfile.zlib = isal_zlib
+except ImportError:
+    pass
 
 # ---------- Configuration ----------
 MYSQL_HOST = "localhost"
@@ -22,9 +32,82 @@ DOWNLOAD_URL = "https://cf-courses-data.s3.us.cloud-object-storage.appdomain.clo
 ZIP_FILE = "employeesdb.zip"
 EXTRACT_DIR = "employeesdb"
 SQL_FILE = f"{EXTRACT_DIR}/employees.sql"
+DOWNLOAD_PARTS = 4  # Parallel byte-range requests used for the download
+
+# Session settings for the bulk import: one transaction, no per-row
+# unique/foreign key checks and no binary logging of the load
+BULK_LOAD_SETTINGS = (
+    "SET autocommit=0",
+    "SET unique_checks=0",
+    "SET foreign_key_checks=0",
+    "SET sql_log_bin=0",
+)
 
 # ---------- Functions ----------
 
+def download_range(url, filename, start, end):
+    """
+    Download bytes start..end of url into the same offsets of filename.
+    
+    Returns the number of bytes written; raises OSError if the server sent
+    fewer or more than were asked for (a short read returns b"", not an error).
+    """
+    request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+    with urllib.request.urlopen(request) as response:
+        if response.status != 206:
+            raise ValueError(f"server ignored Range header (status {response.status})")
+        fd = os.open(filename, os.O_WRONLY)
+        try:
+            offset = start
+            while chunk := response.read(1024 * 1024):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        finally:
+            os.close(fd)
+    if offset != end + 1:
+        raise OSError(f"range {start}-{end} returned {offset - start} of {end - start + 1} bytes")
+    return offset - start
+
+def download_in_parts(url, filename, parts):
+    """
+    Download url with parallel byte-range requests.
+    
+    Returns False, leaving nothing behind, when the server does not
+    support ranges (or rejects HEAD, or a range comes back short) so the
+    caller can fall back to a plain download.
+    """
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method="HEAD")) as response:
+            size = int(response.headers.get("Content-Length") or 0)
+            accepts_ranges = response.headers.get("Accept-Ranges") == "bytes"
+    except (OSError, ValueError):  # URLError and HTTPError are OSErrors
+        return False
+    if not accepts_ranges or size == 0:
+        return False
+    
+    # Write to a temporary name so an interrupted download is never mistaken
+    # for a complete one on the next run
+    partial = f"{filename}.part"
+    with open(partial, "wb") as f:
+        f.truncate(size)
+    
+    step = -(-size // parts)  # ceiling division
+    starts = range(0, size, step)
+    ends = [min(start + step, size) - 1 for start in starts]
+    try:
+        with ThreadPoolExecutor(max_workers=parts) as executor:
+            written = sum(executor.map(download_range, repeat(url), repeat(partial), starts, ends))
+        if written != size:
+            raise OSError(f"downloaded {written} of {size} bytes")
+        os.replace(partial, filename)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Parallel download failed ({e}), downloading in one request")
+        return False
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
 def download_database(url, filename):
     """Download the employees database zip file."""
     if Path(filename).exists():
@@ -33,7 +116,8 @@ def download_database(url, filename):
     
     print(f"[DOWNLOAD] Downloading database from {url}...")
     try:
-        urllib.request.urlretrieve(url, filename)
+        if not download_in_parts(url, filename, DOWNLOAD_PARTS):
+            urllib.request.urlretrieve(url, filename)
         print(f"[OK] Downloaded {filename}")
         return True
     except Exception as e:
@@ -49,46 +133,97 @@ def extract_database(zip_file, extract_to):
     print(f"[EXTRACT] Extracting {zip_file}...")
     try:
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall()
+            members = zip_ref.infolist()
+        
+        # Create every directory first so the workers never race on makedirs
+        for member in members:
+            target = member_path(member.filename)
+            (target if member.is_dir() else target.parent).mkdir(parents=True, exist_ok=True)
+        
+        # Each member is independent, so inflate them in parallel
+        names = [member.filename for member in members if not member.is_dir()]
+        workers = max(1, min(len(names), os.cpu_count() or 1))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(extract_member, repeat(zip_file), names))
         print(f"[OK] Extracted to {extract_to}")
         return True
     except Exception as e:
         print(f"[ERROR] Extraction failed: {e}")
         return False
 
-def create_database(host, port, user, password):
-    """Create the employees database if it doesn't exist."""
-    print(f"[INFO] Creating database '{DB_NAME}' if it doesn't exist...")
+def member_path(name):
+    """
+    Where ZipFile.extract puts a member, relative to the current directory.
     
-    cmd = [
-        'mysql',
-        '-h', host,
-        '-P', port,
-        '-u', user,
-        '-e', f'CREATE DATABASE IF NOT EXISTS {DB_NAME};'
-    ]
+    Drive letters, leading separators and . / .. parts are dropped the same
+    way ZipFile does, so an entry like ../x/ cannot point outside it.
+    """
+    path = name.replace('/', os.path.sep)
+    if os.path.altsep:
+        path = path.replace(os.path.altsep, os.path.sep)
+    path = os.path.splitdrive(path)[1]
+    parts = [part for part in path.split(os.path.sep)
+             if part not in ('', os.path.curdir, os.path.pardir)]
+    return Path(*parts)
+
+def extract_member(zip_file, name):
+    """Extract a single member; runs in a worker process."""
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        zip_ref.extract(name)
+
+def get_connection(host, port, user, password):
+    """Open the single MySQL connection used for the whole setup."""
+    try:
+        return mysql.connector.connect(host=host, port=int(port), user=user,
+                                       password=password, autocommit=False)
+    except Error as e:
+        print(f"[ERROR] Connection error: {e}")
+        return None
+
+def read_sql_statements(sql_file):
+    """
+    Yield the statements of a mysql client script one at a time.
     
-    env = os.environ.copy()
-    if password:
-        env['MYSQL_PWD'] = password
+    The employees dump loads its data through client-side 'source' commands,
+    so those are followed here, relative to the including file first.
+    """
+    sql_file = Path(sql_file)
+    statement = []
+    with open(sql_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if not statement:
+                if not stripped or stripped.startswith('--'):
+                    continue
+                if stripped.lower().startswith('source '):
+                    included = stripped[len('source '):].rstrip(';').strip()
+                    included_path = sql_file.parent / included
+                    if not included_path.exists():
+                        included_path = Path(included)
+                    yield from read_sql_statements(included_path)
+                    continue
+            statement.append(line)
+            if stripped.endswith(';'):
+                yield ''.join(statement)
+                statement = []
+    if statement:
+        yield ''.join(statement)
+
+def create_database(conn):
+    """Create the employees database if it doesn't exist."""
+    print(f"[INFO] Creating database '{DB_NAME}' if it doesn't exist...")
     
     try:
-        result = subprocess.run(cmd, env=env, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"[OK] Database '{DB_NAME}' is ready.")
-            return True
-        else:
-            print(f"[ERROR] Error creating database: {result.stderr}")
-            return False
-    except FileNotFoundError:
-        print("[ERROR] Error: mysql command not found!")
-        print("        Please install MySQL client: brew install mysql")
-        return False
-    except Exception as e:
-        print(f"[ERROR] Error: {e}")
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME};")
+        cursor.close()
+        print(f"[OK] Database '{DB_NAME}' is ready.")
+        return True
+    except Error as e:
+        print(f"[ERROR] Error creating database: {e}")
         return False
 
-def import_sql_file(sql_file, host, port, user, password, db_name):
+def import_sql_file(conn, sql_file, db_name):
     """Import the SQL file into MySQL."""
     if not Path(sql_file).exists():
         print(f"[ERROR] Error: {sql_file} not found!")
@@ -97,66 +232,56 @@ def import_sql_file(sql_file, host, port, user, password, db_name):
     print(f"[IMPORT] Importing {sql_file} into database '{db_name}'...")
     print("         This may take 1-2 minutes...")
     
-    cmd = [
-        'mysql',
-        '-h', host,
-        '-P', port,
-        '-u', user,
-        db_name
-    ]
-    
-    env = os.environ.copy()
-    if password:
-        env['MYSQL_PWD'] = password
-    
     try:
-        with open(sql_file, 'r', encoding='utf-8') as f:
-            result = subprocess.run(cmd, stdin=f, env=env, capture_output=True, text=True)
+        conn.database = db_name
+        cursor = conn.cursor()
+        
+        # Bulk-load session settings, then the dump, committed once at the end
+        for setting in BULK_LOAD_SETTINGS:
+            cursor.execute(setting)
+        for statement in read_sql_statements(sql_file):
+            cursor.execute(statement)
+            if cursor.with_rows:
+                # Progress messages such as SELECT 'LOADING employees' AS INFO
+                for row in cursor.fetchall():
+                    print(f"         {' '.join(map(str, row))}")
+        conn.commit()
+        cursor.close()
         
-        if result.returncode == 0:
-            print("[OK] Database imported successfully!")
-            if result.stdout:
-                print("Output:")
-                print(result.stdout[:500])  # Print first 500 chars
-            return True
-        else:
-            print(f"[ERROR] Import error: {result.stderr[:500]}")
-            return False
-    except FileNotFoundError:
-        print("[ERROR] Error: mysql command not found!")
+        print("[OK] Database imported successfully!")
+        return True
+    except Error as e:
+        rollback_quietly(conn)
+        print(f"[ERROR] Import error: {e}")
         return False
     except Exception as e:
+        rollback_quietly(conn)
         print(f"[ERROR] Error: {e}")
         return False
 
-def verify_import(host, port, user, password, db_name):
+def rollback_quietly(conn):
+    """Roll back after a failed import; a dropped connection has nothing to roll back."""
+    try:
+        conn.rollback()
+    except Exception:
+        pass  # Keep the original error as the one reported
+
+def verify_import(conn, db_name):
     """Verify the database was imported correctly."""
     print(f"\n[VERIFY] Verifying import...")
     
-    cmd = [
-        'mysql',
-        '-h', host,
-        '-P', port,
-        '-u', user,
-        db_name,
-        '-e', 'SHOW TABLES;'
-    ]
-    
-    env = os.environ.copy()
-    if password:
-        env['MYSQL_PWD'] = password
-    
     try:
-        result = subprocess.run(cmd, env=env, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("Tables in employees database:")
-            print(result.stdout)
-            return True
-        else:
-            print(f"[ERROR] Verification error: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"[ERROR] Error: {e}")
+        conn.database = db_name
+        cursor = conn.cursor()
+        cursor.execute("SHOW TABLES;")
+        tables = cursor.fetchall()
+        cursor.close()
+        print("Tables in employees database:")
+        for (table,) in tables:
+            print(table)
+        return True
+    except Error as e:
+        print(f"[ERROR] Verification error: {e}")
         return False
 
 # ---------- Main ----------
@@ -186,17 +311,25 @@ if __name__ == "__main__":
     if not extract_database(ZIP_FILE, EXTRACT_DIR):
         sys.exit(1)
     
-    # Step 3: Create database
-    if not create_database(MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD):
+    # Steps 3-5 share one connection
+    conn = get_connection(MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD)
+    if not conn:
         sys.exit(1)
     
-    # Step 4: Import
-    if not import_sql_file(SQL_FILE, MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, DB_NAME):
-        sys.exit(1)
-    
-    # Step 5: Verify
-    if not verify_import(MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, DB_NAME):
-        sys.exit(1)
+    try:
+        # Step 3: Create database
+        if not create_database(conn):
+            sys.exit(1)
+        
+        # Step 4: Import
+        if not import_sql_file(conn, SQL_FILE, DB_NAME):
+            sys.exit(1)
+        
+        # Step 5: Verify
+        if not verify_import(conn, DB_NAME):
+            sys.exit(1)
+    finally:
+        conn.close()
     
     print("\n" + "=" * 70)
     print("[OK] Setup Complete!")
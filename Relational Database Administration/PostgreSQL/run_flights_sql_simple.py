@@ -4,9 +4,12 @@ Simple script to execute flights.sql using psql command-line tool.
 This is the recommended way to run PostgreSQL dump files.
 """
 
+import selectors
 import subprocess
+import shutil
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ---------- Connection settings ----------
@@ -16,10 +19,124 @@ PG_PORT = "5432"
 PG_USER = "katehoncharova"  # Your macOS username (PostgreSQL user)
 PG_PASSWORD = ""  # No password needed for local PostgreSQL
 
-def run_sql_file_with_psql(sql_file_path):
+# Full path of psql, looked up on PATH once at import (None if not installed)
+PSQL_PATH = shutil.which('psql')
+PG_RESTORE_PATH = shutil.which('pg_restore')
+
+# pg_dump custom-format (-Fc) archives start with these bytes; directory-format
+# (-Fd) archives are a directory holding toc.dat
+ARCHIVE_MAGIC = b"PGDMP"
+
+# Bytes copied into psql's stdin per call
+STREAM_CHUNK = 1024 * 1024
+
+# Compressed dumps are decompressed by these tools straight into psql's stdin
+DECOMPRESSORS = {
+    ".gz": ["gzip", "-dc"],
+    ".zst": ["zstd", "-dc"],
+    ".lz4": ["lz4", "-dc"],
+}
+
+def stream_file(sql_file, pipe):
+    """
+    Copy the SQL file into psql's stdin and close it.
+    
+    Uses os.sendfile (kernel-side copy, Linux) and falls back to a chunked
+    copy where the OS does not support sendfile into a pipe.
+    """
+    try:
+        with open(sql_file, 'rb') as f:
+            offset = 0
+            try:
+                while True:
+                    sent = os.sendfile(pipe.fileno(), f.fileno(), offset, STREAM_CHUNK)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except BrokenPipeError:
+                raise
+            except (AttributeError, OSError):
+                f.seek(offset)
+                shutil.copyfileobj(f, pipe, STREAM_CHUNK)
+    except BrokenPipeError:
+        pass  # psql exited early; its stderr says why
+    finally:
+        pipe.close()
+
+def relay_output(proc):
+    """Copy psql's stdout and stderr to ours as they arrive, without keeping them."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ, sys.stdout)
+        selector.register(proc.stderr, selectors.EVENT_READ, sys.stderr)
+        while selector.get_map():
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, STREAM_CHUNK)
+                if not chunk:
+                    selector.unregister(key.fileobj)  # psql closed this stream
+                    continue
+                key.data.buffer.write(chunk)
+                key.data.buffer.flush()
+
+def is_pg_archive(sql_file):
+    """Check whether a path is a pg_dump custom or directory archive rather than plain SQL"""
+    sql_file = Path(sql_file)
+    if sql_file.is_dir():
+        return (sql_file / "toc.dat").is_file()
+    with open(sql_file, 'rb') as f:
+        return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+def restore_archive(sql_file, host, port, user, env, dbname):
+    """
+    Restore a pg_dump archive with pg_restore, one job per CPU.
+    
+    psql cannot read these archives; pg_restore -j loads table data and
+    builds indexes over several connections at once.
+    """
+    if PG_RESTORE_PATH is None:
+        print("Error: pg_restore command not found!")
+        print("   It is needed to restore the pg_dump archive " + sql_file.name)
+        return False
+    
+    jobs = os.cpu_count() or 1
+    print(f"Restoring pg_dump archive: {sql_file} ({jobs} parallel jobs)")
+    print(f"Connecting to PostgreSQL at {host}:{port} as user {user}\n")
+    sys.stdout.flush()  # Keep our messages ahead of pg_restore's output
+    result = subprocess.run([
+        PG_RESTORE_PATH,
+        '-h', host,
+        '-p', str(port),
+        '-U', user,
+        '-d', dbname,
+        '-j', str(jobs),
+        str(sql_file)
+    ], env=env)
+    
+    if result.returncode == 0:
+        print("\nArchive restored successfully!")
+        return True
+    print(f"\nError restoring archive (pg_restore exited with code {result.returncode})")
+    return False
+
+def print_psql_missing():
+    """Explain how to install psql when it is not on PATH"""
+    print("Error: psql command not found!")
+    print("   Please make sure PostgreSQL client tools are installed.")
+    print("   On macOS: brew install postgresql")
+    print("   On Ubuntu: sudo apt-get install postgresql-client")
+
+def run_sql_file_with_psql(sql_file_path, host=PG_HOST, port=PG_PORT, user=PG_USER,
+                           password=PG_PASSWORD, dbname="postgres"):
     """
     Execute SQL file using psql command-line tool.
     This is the most reliable way to handle PostgreSQL dump files.
+    
+    The connection settings default to the values above; run_flights_sql.py
+    passes its own DB_CONFIG when it hands a large dump over to psql.
+    Files ending in .gz, .zst or .lz4 are piped through the matching
+    decompressor (see DECOMPRESSORS), and pg_dump custom/directory archives
+    are handed to pg_restore instead of psql.
     """
     sql_file = Path(sql_file_path)
     
@@ -27,57 +144,89 @@ def run_sql_file_with_psql(sql_file_path):
         print(f"Error: File {sql_file_path} not found!")
         return False
     
-    # Set PGPASSWORD environment variable for password authentication (only if password is provided)
-    env = dict(os.environ)
-    if PG_PASSWORD:
-        env['PGPASSWORD'] = PG_PASSWORD
+    # Set PGPASSWORD environment variable for password authentication (only if password is provided);
+    # otherwise env=None lets psql inherit our environment without copying it
+    env = {**os.environ, 'PGPASSWORD': password} if password else None
+    
+    if sql_file.suffix.lower() not in DECOMPRESSORS and is_pg_archive(sql_file):
+        return restore_archive(sql_file, host, port, user, env, dbname)
+    
+    if PSQL_PATH is None:
+        print_psql_missing()
+        return False
     
     # Build psql command
     # Connect to 'postgres' database first (flights.sql will create 'demo' database)
     psql_cmd = [
-        'psql',
-        '-h', PG_HOST,
-        '-p', PG_PORT,
-        '-U', PG_USER,
-        '-d', 'postgres',  # Connect to default postgres database
-        '-f', str(sql_file)
-    ]
+        PSQL_PATH,
+        '-h', host,
+        '-p', str(port),
+        '-U', user,
+        '-d', dbname  # Default postgres database unless told otherwise
+    ]  # The SQL itself is streamed to psql's stdin
     
     print(f"Executing SQL file: {sql_file_path}")
-    print(f"Connecting to PostgreSQL at {PG_HOST}:{PG_PORT} as user {PG_USER}")
+    print(f"Connecting to PostgreSQL at {host}:{port} as user {user}")
     print("This may take a while for large files...\n")
     
+    decompress = DECOMPRESSORS.get(sql_file.suffix.lower())
+    decompressor = None
+    if decompress:
+        try:
+            decompressor = subprocess.Popen(decompress + [str(sql_file)], stdout=subprocess.PIPE)
+        except FileNotFoundError:
+            print(f"Error: {decompress[0]} command not found!")
+            print(f"   It is needed to read {sql_file.name}.")
+            return False
+    
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             psql_cmd,
             env=env,
-            capture_output=True,
-            text=True
+            # A compressed dump flows from the decompressor to psql through
+            # one pipe, without passing through this process
+            stdin=decompressor.stdout if decompressor else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0  # Unbuffered pipes, so sendfile writes straight into stdin
         )
+        if decompressor:
+            # psql now holds the read end; closing ours lets the decompressor
+            # get SIGPIPE if psql exits early
+            decompressor.stdout.close()
+        
+        # Feed the file on a worker thread while this thread passes psql's
+        # output through as it is produced
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            feeding = None
+            if decompressor is None:
+                feeding = pool.submit(stream_file, sql_file, proc.stdin)
+            relay_output(proc)
+        returncode = proc.wait()
+        if feeding:
+            feeding.result()  # Re-raise anything that went wrong reading the file
+        
+        if decompressor and decompressor.wait() != 0 and returncode == 0:
+            print(f"Error: {decompress[0]} could not decompress {sql_file_path}")
+            return False
         
-        if result.returncode == 0:
-            print("SQL file executed successfully!")
-            if result.stdout:
-                print("\nOutput:")
-                print(result.stdout)
+        if returncode == 0:
+            print("\nSQL file executed successfully!")
             return True
         else:
-            print("Error executing SQL file:")
-            print(result.stderr)
-            if result.stdout:
-                print("\nOutput:")
-                print(result.stdout)
+            print(f"\nError executing SQL file (psql exited with code {returncode})")
             return False
             
     except FileNotFoundError:
-        print("Error: psql command not found!")
-        print("   Please make sure PostgreSQL client tools are installed.")
-        print("   On macOS: brew install postgresql")
-        print("   On Ubuntu: sudo apt-get install postgresql-client")
+        print_psql_missing()  # psql was removed after PSQL_PATH was looked up
         return False
     except Exception as e:
         print(f"Error: {e}")
         return False
+    finally:
+        if decompressor and decompressor.poll() is None:
+            decompressor.kill()
+            decompressor.wait()
 
 if __name__ == "__main__":
     # Password check removed - empty password is OK for local PostgreSQL
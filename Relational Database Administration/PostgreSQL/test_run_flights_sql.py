@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests for the INSERT to COPY conversion in run_flights_sql.py.
+Run from this directory with: python -m unittest test_run_flights_sql
+"""
+
+import unittest
+
+from run_flights_sql import parse_insert
+
+class ParseInsertTest(unittest.TestCase):
+    """parse_insert must only convert INSERTs whose COPY rows store the same data"""
+
+    def test_canonical_numbers_are_copied(self):
+        self.assertEqual(parse_insert("INSERT INTO t (x) VALUES (7), (-12), (1.50), (0);"),
+                         (('t', ' (x)'), [['7'], ['-12'], ['1.50'], ['0']]))
+
+    def test_text_column_with_non_canonical_number_is_not_converted(self):
+        # INSERT would store '7' in a text column, COPY would store '007'
+        for number in ('007', '+1', '.5', '1.', '-3e2', '-0'):
+            with self.subTest(number=number):
+                self.assertIsNone(parse_insert(f"INSERT INTO notes (body) VALUES ({number});"))
+
+    def test_booleans_are_lowercased(self):
+        self.assertEqual(parse_insert("INSERT INTO t VALUES (TRUE, False);"),
+                         (('t', ''), [['true', 'false']]))
+
+    def test_trailing_comma_is_rejected(self):
+        self.assertIsNone(parse_insert("INSERT INTO t VALUES ('a'), ;"))
+
+    def test_leading_comments_are_skipped(self):
+        self.assertEqual(parse_insert("-- Data for t\n/* x */ INSERT INTO t VALUES ('a');"),
+                         (('t', ''), [['a']]))
+
+if __name__ == "__main__":
+    unittest.main()